@@ -4,27 +4,211 @@ A comprehensive academic planning tool for university students
 """
 
 import streamlit as st
-import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
-import datetime
-import random
-from typing import Dict, List
+import numpy as np
 
 # Import our custom modules
 import sys
 import os
+import shutil
 import tempfile
+from collections import defaultdict
+from pathlib import Path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from course_utils import AcademicRecord, Course, calculate_grade_points, get_letter_grade
+from course_utils import AcademicRecord, Course
 from cgpa_calculator import CGPACalculator, WhatIfAnalyzer
 from course_data import (
-    GRADES, GRADE_POINTS, get_all_courses, get_unlocked_courses, 
+    GRADES, GRADE_INDEX, GRADE_POINTS, get_all_courses, get_unlocked_courses, 
     categorize_course, get_program_requirements, plan_general_education_courses,
-    COURSE_NAMES, get_course_credit
+    COURSE_NAMES, get_course_credit, get_course_label
 )
-from bracu_parser import create_parser
+
+
+@st.cache_data(max_entries=128)
+def get_cached_overview(_record, fingerprint, program):
+    """CGPA, credit totals and program requirements in one cached lookup"""
+    requirements = get_program_requirements(program)
+    current_credits = _record.get_total_credits()
+    return {
+        'current_cgpa': _record.get_current_cgpa(),
+        'current_credits': current_credits,
+        'remaining_credits': requirements['total_credits'] - current_credits,
+        'requirements': requirements,
+        'progress_percentage': (current_credits / requirements['total_credits']) * 100
+    }
+
+
+@st.cache_data
+def get_cached_all_courses():
+    """All known course codes, computed once per process"""
+    return tuple(get_all_courses())
+
+
+@st.cache_data(max_entries=128)
+def get_cached_available_courses(completed_courses):
+    """Catalogue courses not in the frozenset of completed codes, in catalogue order"""
+    return [c for c in get_cached_all_courses() if c not in completed_courses]
+
+
+@st.cache_data(max_entries=128)
+def get_cached_unlocked_courses(completed_courses):
+    """Unlocked courses for a frozenset of completed course codes"""
+    return get_unlocked_courses(completed_courses)
+
+
+@st.cache_data(max_entries=128)
+def get_cached_cgpa_projection(_calculator, fingerprint, total_required_credits, target_cgpa=None):
+    """CGPA projection keyed by the record fingerprint rather than the calculator"""
+    return _calculator.calculate_cgpa_projection(
+        target_cgpa=target_cgpa,
+        total_required_credits=total_required_credits
+    )
+
+
+@st.cache_data(max_entries=128)
+def get_cached_performance_stats(_calculator, fingerprint):
+    """Performance statistics keyed by the record fingerprint"""
+    return _calculator.get_performance_stats()
+
+
+@st.cache_data(max_entries=128)
+def get_cached_grade_distribution(_calculator, fingerprint):
+    """Grade distribution keyed by the record fingerprint"""
+    return _calculator.get_grade_distribution()
+
+
+@st.cache_data(max_entries=128)
+def get_cached_semester_trends(_calculator, fingerprint):
+    """Semester GPA/CGPA trends keyed by the record fingerprint"""
+    return _calculator.get_semester_trends()
+
+
+@st.cache_data(max_entries=128)
+def build_course_frame(_record, fingerprint, program):
+    """One row per course taken, with its category and quality points"""
+    import pandas as pd
+    
+    courses = _record.courses_taken
+    codes = list(courses.keys())
+    return pd.DataFrame({
+        'code': codes,
+        'name': [COURSE_NAMES.get(code, 'Unknown') for code in codes],
+        'grade': [course.grade for course in courses.values()],
+        'gpa': [course.gpa for course in courses.values()],
+        'credit': [course.credit for course in courses.values()],
+        'category': [categorize_course(code, program) for code in codes],
+        'qp': [course.quality_points for course in courses.values()]
+    })
+
+
+@st.cache_data(max_entries=128)
+def build_progress_figure(completed_credits, total_required):
+    """Degree progress pie chart, rebuilt only when the credit totals change"""
+    import plotly.graph_objects as go
+    
+    remaining_credits = total_required - completed_credits
+    fig_progress = go.Figure(data=[go.Pie(
+        labels=['Completed', 'Remaining'],
+        values=[completed_credits, remaining_credits],
+        hole=0.4,
+        marker_colors=['#2E8B57', '#FF6B6B']
+    )])
+    
+    fig_progress.update_traces(textposition='inside', textinfo='percent+label')
+    fig_progress.update_layout(
+        title=f"Degree Progress ({completed_credits}/{total_required} credits)",
+        showlegend=True,
+        height=400
+    )
+    return fig_progress
+
+
+@st.cache_data(max_entries=128)
+def build_grade_distribution_figure(grade_items):
+    """Grade distribution bar chart for a tuple of (grade, count) pairs"""
+    import plotly.express as px
+    
+    grades = [grade for grade, _ in grade_items]
+    counts = [count for _, count in grade_items]
+    return px.bar(
+        x=grades, y=counts,
+        title="Distribution of Grades",
+        labels={'x': 'Grade', 'y': 'Number of Courses'},
+        color=counts,
+        color_continuous_scale='viridis'
+    )
+
+
+@st.cache_data(max_entries=128)
+def build_trends_figure(semesters, gpas, cgpas):
+    """Semester GPA and cumulative CGPA line chart"""
+    import plotly.graph_objects as go
+    
+    fig_trends = go.Figure()
+    
+    fig_trends.add_trace(go.Scatter(
+        x=list(semesters),
+        y=list(gpas),
+        mode='lines+markers',
+        name='Semester GPA',
+        line=dict(color='blue'),
+        marker=dict(size=8)
+    ))
+    
+    fig_trends.add_trace(go.Scatter(
+        x=list(semesters),
+        y=list(cgpas),
+        mode='lines+markers',
+        name='Cumulative CGPA',
+        line=dict(color='red'),
+        marker=dict(size=8)
+    ))
+    
+    fig_trends.update_layout(
+        title="GPA Trends Over Time",
+        xaxis_title="Semester",
+        yaxis_title="GPA",
+        yaxis=dict(range=[0, 4.1]),
+        hovermode='x unified'
+    )
+    return fig_trends
+
+
+@st.cache_data(max_entries=128)
+def build_category_figure(categories, avg_gpas):
+    """Average GPA per course category bar chart"""
+    import plotly.graph_objects as go
+    
+    fig_category = go.Figure()
+    
+    fig_category.add_trace(go.Bar(
+        x=list(categories),
+        y=list(avg_gpas),
+        name='Average GPA',
+        marker_color='lightblue',
+        text=[f"{gpa:.2f}" for gpa in avg_gpas],
+        textposition='auto'
+    ))
+    
+    fig_category.update_layout(
+        title="Average GPA by Course Category",
+        xaxis_title="Course Category",
+        yaxis_title="Average GPA",
+        yaxis=dict(range=[0, 4.1])
+    )
+    return fig_category
+
+
+@st.cache_resource
+def get_parser():
+    """Shared gradesheet parser, constructed once per process"""
+    # Deferred so sessions that never upload skip the PyMuPDF import
+    from bracu_parser import create_parser
+    return create_parser()
+
+
+# Typical semester load used for graduation estimates (4 courses * 3 credits)
+CREDITS_PER_SEMESTER = 12
 
 # Page configuration
 st.set_page_config(
@@ -35,7 +219,7 @@ st.set_page_config(
 )
 
 # Custom CSS for better appearance
-st.markdown("""
+CUSTOM_CSS = """
 <style>
 /* Main theme */
 .main {
@@ -91,7 +275,8 @@ h1 {
     margin: 1rem 0;
 }
 </style>
-""", unsafe_allow_html=True)
+"""
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 # Initialize session state
 if 'academic_record' not in st.session_state:
@@ -110,6 +295,22 @@ if 'uploaded_gradesheet' not in st.session_state:
     st.session_state.courses_done = {}
     st.session_state.semesters_done = {}
 
+def get_record_overview():
+    """Fingerprint and cached overview of the session's academic record as it is now"""
+    record = st.session_state.academic_record
+    fingerprint = record.get_fingerprint()
+    return fingerprint, get_cached_overview(record, fingerprint, st.session_state.program)
+
+
+# Derived totals for the header and sidebar; tab fragments read their own with
+# get_record_overview(), since a fragment can rerun without the rest of the script
+record_fingerprint, overview = get_record_overview()
+current_cgpa = overview['current_cgpa']
+current_credits = overview['current_credits']
+remaining_credits = overview['remaining_credits']
+requirements = overview['requirements']
+progress_percentage = overview['progress_percentage']
+
 # Title and description
 st.title("🎓 CGPA Projection & Academic Planning Tool")
 st.markdown("""
@@ -142,10 +343,6 @@ if st.session_state.uploaded_gradesheet:
 if st.session_state.academic_record.courses_taken:
     col1, col2, col3, col4 = st.columns(4)
     
-    current_cgpa = st.session_state.calculator.academic_record.get_current_cgpa()
-    current_credits = st.session_state.calculator.academic_record.get_total_credits()
-    requirements = get_program_requirements(st.session_state.program)
-    
     with col1:
         st.metric("👤 Student", 
                  st.session_state.academic_record.student_name or "Not Set",
@@ -160,8 +357,7 @@ if st.session_state.academic_record.courses_taken:
                  help=f"Out of {requirements['total_credits']} required credits")
     
     with col4:
-        progress = (current_credits / requirements['total_credits']) * 100
-        st.metric("📊 Progress", f"{progress:.1f}%",
+        st.metric("📊 Progress", f"{progress_percentage:.1f}%",
                  help="Degree completion progress")
 
 # Sidebar for student information and program selection
@@ -192,13 +388,17 @@ if uploaded_file is not None:
     if st.sidebar.button("🔍 Parse Gradesheet", type="primary"):
         try:
             with st.spinner("Parsing gradesheet..."):
-                # Save uploaded file as temp.pdf (BRACU analyzer style)
-                with open("temp.pdf", "wb") as f:
-                    f.write(uploaded_file.read())
+                # Stream the upload to a per-session temp file instead of a shared temp.pdf
+                with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+                    shutil.copyfileobj(uploaded_file, tmp, length=1 << 20)
+                    tmp_path = tmp.name
                 
                 # Parse the gradesheet using BRACU-specific parser
-                parser = create_parser()
-                name, student_id, courses_done, semesters_done = parser.extract_gradesheet("temp.pdf")
+                try:
+                    parser = get_parser()
+                    name, student_id, courses_done, semesters_done = parser.extract_gradesheet(tmp_path)
+                finally:
+                    Path(tmp_path).unlink(missing_ok=True)
                 
                 # Update session state with parsed data
                 if name and student_id and courses_done:
@@ -213,37 +413,32 @@ if uploaded_file is not None:
                     # Convert parsed data to our AcademicRecord format
                     record = AcademicRecord(name, student_id)
                     
-                    # Add all courses to the record
+                    # Index which semester each course belongs to
+                    course_to_semester = {
+                        sem_course.course_code: sem_name
+                        for sem_name, sem_obj in semesters_done.items()
+                        if hasattr(sem_obj, 'courses')
+                        for sem_course in sem_obj.courses
+                    }
+                    
+                    # Add all courses to the record, one batch per semester
+                    courses_by_semester = defaultdict(list)
                     for course_code, course in courses_done.items():
-                        # Find which semester this course belongs to
-                        semester_name = "IMPORTED COURSES"
-                        for sem_name, sem_obj in semesters_done.items():
-                            if hasattr(sem_obj, 'courses'):
-                                for sem_course in sem_obj.courses:
-                                    if sem_course.course_code == course_code:
-                                        semester_name = sem_name
-                                        break
-                        
-                        # Add course to the record
-                        record.add_course_to_semester(semester_name, course)
+                        courses_by_semester[course_to_semester.get(course_code, "IMPORTED COURSES")].append(course)
+                    for semester_name, semester_courses in courses_by_semester.items():
+                        record.add_courses_to_semester(semester_name, semester_courses)
                     
                     st.session_state.academic_record = record
                     st.session_state.calculator = CGPACalculator(record)
                     st.session_state.analyzer = WhatIfAnalyzer(st.session_state.calculator)
                     
-                    # Clean up temp file
-                    if os.path.exists("temp.pdf"):
-                        os.unlink("temp.pdf")
-                    
                     # Show success message
                     st.sidebar.success("✅ Gradesheet parsed successfully!")
                     st.sidebar.write(f"� **Student:** {name}")
                     st.sidebar.write(f"🆔 **ID:** {student_id}")
                     st.sidebar.write(f"📚 **Courses:** {len(courses_done)}")
                     st.sidebar.write(f"📖 **Semesters:** {len(semesters_done)}")
-                    
-                    current_cgpa = st.session_state.academic_record.get_current_cgpa() if st.session_state.academic_record else 0.0
-                    st.sidebar.write(f"🎯 **CGPA:** {current_cgpa:.2f}")
+                    st.sidebar.write(f"🎯 **CGPA:** {record.get_current_cgpa():.2f}")
                     
                     st.rerun()
                 else:
@@ -259,10 +454,6 @@ if uploaded_file is not None:
             st.sidebar.write("- File is a valid PDF")
             st.sidebar.write("- Gradesheet contains course codes and grades")
             st.sidebar.write("- Text is readable (not scanned image)")
-            
-            # Clean up temp file on error
-            if os.path.exists("temp.pdf"):
-                os.unlink("temp.pdf")
 
 # Manual entry section
 st.sidebar.markdown("---")
@@ -290,19 +481,13 @@ if st.sidebar.button("🗑️ Clear All Data", help="Reset and start fresh"):
     st.rerun()
 
 # Program requirements
-requirements = get_program_requirements(st.session_state.program)
-
 st.sidebar.markdown("---")
 st.sidebar.subheader("📊 Program Requirements")
 st.sidebar.metric("Total Credits Required", requirements["total_credits"])
 
-current_cgpa = st.session_state.calculator.academic_record.get_current_cgpa()
-current_credits = st.session_state.calculator.academic_record.get_total_credits()
-
 st.sidebar.metric("Current CGPA", f"{current_cgpa:.2f}")
 st.sidebar.metric("Credits Completed", f"{current_credits}/{requirements['total_credits']}")
 
-progress_percentage = (current_credits / requirements['total_credits']) * 100
 st.sidebar.progress(progress_percentage / 100)
 st.sidebar.caption(f"Progress: {progress_percentage:.1f}%")
 
@@ -313,7 +498,9 @@ tab1, tab2, tab3, tab4, tab5 = st.tabs([
 ])
 
 # Tab 1: Course Management
-with tab1:
+@st.fragment
+def render_course_management():
+    """Course Management tab; its widgets rerun only this tab, record changes rerun the app"""
     st.header("🎯 Course Management")
     
     col1, col2 = st.columns(2)
@@ -323,14 +510,14 @@ with tab1:
         st.subheader("➕ Add Course")
         
         with st.form("add_course_form"):
-            all_courses = get_all_courses()
-            completed_courses = list(st.session_state.academic_record.courses_taken.keys())
-            available_courses = [c for c in all_courses if c not in completed_courses]
+            available_courses = get_cached_available_courses(
+                st.session_state.academic_record.get_completed_course_set()
+            )
             
             course_code = st.selectbox(
                 "Select Course:",
                 [""] + available_courses,
-                format_func=lambda x: f"{x} - {COURSE_NAMES.get(x, 'Course')}" if x else "Select a course"
+                format_func=get_course_label
             )
             
             col_grade, col_gpa = st.columns(2)
@@ -368,8 +555,8 @@ with tab1:
         if st.session_state.academic_record.courses_taken:
             course_to_manage = st.selectbox(
                 "Select Course to Manage:",
-                [""] + list(st.session_state.academic_record.courses_taken.keys()),
-                format_func=lambda x: f"{x} - {COURSE_NAMES.get(x, 'Course')}" if x else "Select a course"
+                ("",) + st.session_state.academic_record.get_completed_courses(),
+                format_func=get_course_label
             )
             
             if course_to_manage:
@@ -384,7 +571,7 @@ with tab1:
                 with st.expander("📝 Edit Course"):
                     with st.form(f"edit_course_{course_to_manage}"):
                         new_grade = st.selectbox("New Grade:", GRADES, 
-                                               index=GRADES.index(current_course.grade) if current_course.grade in GRADES else 0)
+                                               index=GRADE_INDEX.get(current_course.grade, 0))
                         new_gpa = st.number_input("New GPA:", value=float(current_course.gpa), min_value=0.0, max_value=4.0, step=0.01)
                         
                         edit_btn = st.form_submit_button("Update Course")
@@ -407,60 +594,81 @@ with tab1:
     st.subheader("📚 Current Courses")
     
     if st.session_state.academic_record.courses_taken:
-        courses_data = []
-        for course_code, course in st.session_state.academic_record.courses_taken.items():
-            courses_data.append({
-                "Course Code": course_code,
-                "Course Name": COURSE_NAMES.get(course_code, "Unknown"),
-                "Grade": course.grade,
-                "GPA": f"{course.gpa:.2f}",
-                "Credits": course.credit,
-                "Category": categorize_course(course_code, st.session_state.program),
-                "Quality Points": f"{course.get_quality_points():.2f}"
-            })
+        import pandas as pd
         
-        df = pd.DataFrame(courses_data)
+        courses = st.session_state.academic_record.courses_taken
+        codes = list(courses.keys())
+        course_credits = [course.credit for course in courses.values()]
+        gpas = np.fromiter((course.gpa for course in courses.values()), dtype=float, count=len(codes))
+        quality_points = gpas * np.asarray(course_credits, dtype=float)
+        total_credits = sum(course_credits)
+        total_qp = float(quality_points.sum())
+        
+        df = pd.DataFrame({
+            "Course Code": codes,
+            "Course Name": [COURSE_NAMES.get(code, "Unknown") for code in codes],
+            "Grade": [course.grade for course in courses.values()],
+            "GPA": [f"{gpa:.2f}" for gpa in gpas],
+            "Credits": course_credits,
+            "Category": [categorize_course(code, st.session_state.program) for code in codes],
+            "Quality Points": [f"{qp:.2f}" for qp in quality_points]
+        })
         st.dataframe(df, use_container_width=True)
         
         # Quick stats
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Total Courses", len(courses_data))
+            st.metric("Total Courses", len(codes))
         with col2:
-            st.metric("Total Credits", sum(course.credit for course in st.session_state.academic_record.courses_taken.values()))
+            st.metric("Total Credits", total_credits)
         with col3:
-            total_qp = sum(course.get_quality_points() for course in st.session_state.academic_record.courses_taken.values())
             st.metric("Quality Points", f"{total_qp:.2f}")
         with col4:
-            st.metric("Current CGPA", f"{current_cgpa:.2f}")
+            cgpa = round(total_qp / total_credits, 2) if total_credits > 0 else 0.0
+            st.metric("Current CGPA", f"{cgpa:.2f}")
     else:
         st.info("No courses added yet.")
 
+
+with tab1:
+    render_course_management()
+
 # Tab 2: CGPA Planning
-with tab2:
+@st.fragment
+def render_planning():
+    """CGPA Planning tab; reruns on its own when its widgets change"""
+    # Read live, since module-level totals are stale on fragment-only reruns
+    fingerprint, overview = get_record_overview()
+    requirements = overview['requirements']
+    
     st.header("📈 CGPA Planning & Projection")
     
     # Max CGPA Projection Section (prominent display)
     st.subheader("🔮 Maximum Achievable CGPA")
-    max_projection = st.session_state.calculator.calculate_cgpa_projection(
-        total_required_credits=requirements["total_credits"]
-    )
-    
-    col_max1, col_max2, col_max3, col_max4 = st.columns(4)
-    with col_max1:
-        st.metric("Current CGPA", f"{max_projection['current_cgpa']:.2f}")
-    with col_max2:
-        st.metric("Credits Completed", f"{max_projection['current_credits']}")
-    with col_max3:
-        st.metric("Remaining Credits", f"{max_projection['remaining_credits']}")
-    with col_max4:
-        st.metric("**MAX Possible CGPA**", f"{max_projection['max_possible_cgpa']:.2f}", 
-                 delta=f"+{max_projection['max_possible_cgpa'] - max_projection['current_cgpa']:.2f}")
-    
-    if max_projection['remaining_credits'] > 0:
-        st.info(f"🎯 **To achieve maximum CGPA:** You need to maintain a **4.0 GPA** in all remaining {max_projection['remaining_credits']} credits.")
+    if not st.session_state.academic_record.courses_taken:
+        st.info("Add some courses to see your maximum achievable CGPA!")
     else:
-        st.success("🎉 **Congratulations!** You have completed all required credits!")
+        max_projection = get_cached_cgpa_projection(
+            st.session_state.calculator,
+            fingerprint,
+            requirements["total_credits"]
+        )
+        
+        col_max1, col_max2, col_max3, col_max4 = st.columns(4)
+        with col_max1:
+            st.metric("Current CGPA", f"{max_projection['current_cgpa']:.2f}")
+        with col_max2:
+            st.metric("Credits Completed", f"{max_projection['current_credits']}")
+        with col_max3:
+            st.metric("Remaining Credits", f"{max_projection['remaining_credits']}")
+        with col_max4:
+            st.metric("**MAX Possible CGPA**", f"{max_projection['max_possible_cgpa']:.2f}", 
+                     delta=f"+{max_projection['max_possible_cgpa'] - max_projection['current_cgpa']:.2f}")
+        
+        if max_projection['remaining_credits'] > 0:
+            st.info(f"🎯 **To achieve maximum CGPA:** You need to maintain a **4.0 GPA** in all remaining {max_projection['remaining_credits']} credits.")
+        else:
+            st.success("🎉 **Congratulations!** You have completed all required credits!")
     
     st.markdown("---")
     
@@ -472,9 +680,11 @@ with tab2:
         target_cgpa = st.number_input("Enter Target CGPA:", min_value=0.0, max_value=4.0, value=3.5, step=0.01)
         
         if st.button("Calculate Requirements", type="primary"):
-            projection = st.session_state.calculator.calculate_cgpa_projection(
-                target_cgpa=target_cgpa, 
-                total_required_credits=requirements["total_credits"]
+            projection = get_cached_cgpa_projection(
+                st.session_state.calculator,
+                fingerprint,
+                requirements["total_credits"],
+                target_cgpa=target_cgpa
             )
             
             st.markdown("### 📊 Projection Results")
@@ -534,19 +744,15 @@ with tab2:
     st.markdown("---")
     st.subheader("🔓 Unlocked Courses")
     
-    completed_courses = list(st.session_state.academic_record.courses_taken.keys())
-    unlocked = get_unlocked_courses(completed_courses)
+    unlocked = get_cached_unlocked_courses(st.session_state.academic_record.get_completed_course_set())
     
     if unlocked:
         st.success(f"You have {len(unlocked)} courses available to take:")
         
         # Categorize unlocked courses
-        unlocked_by_category = {}
+        unlocked_by_category = defaultdict(list)
         for course in unlocked:
-            category = categorize_course(course, st.session_state.program)
-            if category not in unlocked_by_category:
-                unlocked_by_category[category] = []
-            unlocked_by_category[category].append(course)
+            unlocked_by_category[categorize_course(course, st.session_state.program)].append(course)
         
         for category, courses in unlocked_by_category.items():
             with st.expander(f"{category} ({len(courses)} courses)"):
@@ -555,151 +761,103 @@ with tab2:
     else:
         st.info("No new courses are unlocked at this time. Complete prerequisite courses to unlock more options.")
 
+
+with tab2:
+    render_planning()
+
 # Tab 3: Analytics & Trends
-with tab3:
+@st.fragment
+def render_analytics():
+    """Analytics & Trends tab; returns early when there is nothing to chart"""
     st.header("📊 Academic Analytics & Trends")
     
     if not st.session_state.academic_record.courses_taken:
         st.info("Add some courses to see analytics and trends!")
-    else:
-        # Performance overview
-        stats = st.session_state.calculator.get_performance_stats()
-        
-        st.subheader("📈 Performance Overview")
-        
-        col1, col2, col3, col4, col5 = st.columns(5)
-        with col1:
-            st.metric("Total Courses", stats['total_courses'])
-        with col2:
-            st.metric("Total Credits", stats['total_credits'])
-        with col3:
-            st.metric("Current CGPA", f"{stats['current_cgpa']:.2f}")
-        with col4:
-            st.metric("Highest GPA", f"{stats['highest_gpa']:.2f}")
-        with col5:
-            st.metric("Average GPA", f"{stats['average_gpa']:.2f}")
-        
-        # Progress visualization
-        st.subheader("🎯 Degree Progress")
-        
-        completed_credits = stats['total_credits']
-        total_required = requirements['total_credits']
-        remaining_credits = total_required - completed_credits
-        
-        # Progress pie chart
-        fig_progress = go.Figure(data=[go.Pie(
-            labels=['Completed', 'Remaining'],
-            values=[completed_credits, remaining_credits],
-            hole=0.4,
-            marker_colors=['#2E8B57', '#FF6B6B']
-        )])
+        return
+    
+    # Read live, since module-level totals are stale on fragment-only reruns
+    record_fingerprint, overview = get_record_overview()
+    requirements = overview['requirements']
+    
+    # Performance overview
+    stats = get_cached_performance_stats(
+        st.session_state.calculator,
+        record_fingerprint
+    )
+    
+    st.subheader("📈 Performance Overview")
+    
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.metric("Total Courses", stats['total_courses'])
+    with col2:
+        st.metric("Total Credits", stats['total_credits'])
+    with col3:
+        st.metric("Current CGPA", f"{stats['current_cgpa']:.2f}")
+    with col4:
+        st.metric("Highest GPA", f"{stats['highest_gpa']:.2f}")
+    with col5:
+        st.metric("Average GPA", f"{stats['average_gpa']:.2f}")
+    
+    # Charts carry stable keys so a data change updates the mounted chart in place
+    # instead of replacing it. Skipping the call is not an option: elements left
+    # out of a rerun are removed from the page.
+    
+    # Progress visualization
+    st.subheader("🎯 Degree Progress")
+    
+    fig_progress = build_progress_figure(stats['total_credits'], requirements['total_credits'])
+    st.plotly_chart(fig_progress, use_container_width=True, key="progress_chart")
+    
+    # Grade distribution
+    st.subheader("📊 Grade Distribution")
+    
+    grade_dist = get_cached_grade_distribution(
+        st.session_state.calculator,
+        record_fingerprint
+    )
+    if grade_dist:
+        fig_grades = build_grade_distribution_figure(tuple(grade_dist.items()))
+        st.plotly_chart(fig_grades, use_container_width=True, key="grade_distribution_chart")
+    
+    # Semester trends
+    trends = get_cached_semester_trends(st.session_state.calculator, record_fingerprint)
+    
+    if len(trends['semesters']) > 1:
+        st.subheader("📈 Semester Trends")
         
-        fig_progress.update_traces(textposition='inside', textinfo='percent+label')
-        fig_progress.update_layout(
-            title=f"Degree Progress ({completed_credits}/{total_required} credits)",
-            showlegend=True,
-            height=400
+        fig_trends = build_trends_figure(
+            tuple(trends['semesters']), tuple(trends['gpas']), tuple(trends['cgpas'])
         )
-        
-        st.plotly_chart(fig_progress, use_container_width=True)
-        
-        # Grade distribution
-        st.subheader("📊 Grade Distribution")
-        
-        grade_dist = st.session_state.calculator.get_grade_distribution()
-        if grade_dist:
-            grades = list(grade_dist.keys())
-            counts = list(grade_dist.values())
-            
-            fig_grades = px.bar(
-                x=grades, y=counts,
-                title="Distribution of Grades",
-                labels={'x': 'Grade', 'y': 'Number of Courses'},
-                color=counts,
-                color_continuous_scale='viridis'
-            )
-            
-            st.plotly_chart(fig_grades, use_container_width=True)
-        
-        # Semester trends
-        trends = st.session_state.calculator.get_semester_trends()
-        
-        if len(trends['semesters']) > 1:
-            st.subheader("📈 Semester Trends")
-            
-            fig_trends = go.Figure()
-            
-            fig_trends.add_trace(go.Scatter(
-                x=trends['semesters'],
-                y=trends['gpas'],
-                mode='lines+markers',
-                name='Semester GPA',
-                line=dict(color='blue'),
-                marker=dict(size=8)
-            ))
-            
-            fig_trends.add_trace(go.Scatter(
-                x=trends['semesters'],
-                y=trends['cgpas'],
-                mode='lines+markers',
-                name='Cumulative CGPA',
-                line=dict(color='red'),
-                marker=dict(size=8)
-            ))
-            
-            fig_trends.update_layout(
-                title="GPA Trends Over Time",
-                xaxis_title="Semester",
-                yaxis_title="GPA",
-                yaxis=dict(range=[0, 4.1]),
-                hovermode='x unified'
-            )
-            
-            st.plotly_chart(fig_trends, use_container_width=True)
-        
-        # Course performance by category
-        st.subheader("📚 Performance by Course Category")
-        
-        category_performance = {}
-        for course_code, course in st.session_state.academic_record.courses_taken.items():
-            category = categorize_course(course_code, st.session_state.program)
-            if category not in category_performance:
-                category_performance[category] = {'gpas': [], 'credits': 0}
-            category_performance[category]['gpas'].append(course.gpa)
-            category_performance[category]['credits'] += course.credit
-        
-        if category_performance:
-            categories = []
-            avg_gpas = []
-            total_credits = []
-            
-            for category, data in category_performance.items():
-                categories.append(category)
-                avg_gpas.append(sum(data['gpas']) / len(data['gpas']))
-                total_credits.append(data['credits'])
-            
-            fig_category = go.Figure()
-            
-            fig_category.add_trace(go.Bar(
-                x=categories,
-                y=avg_gpas,
-                name='Average GPA',
-                marker_color='lightblue',
-                text=[f"{gpa:.2f}" for gpa in avg_gpas],
-                textposition='auto'
-            ))
-            
-            fig_category.update_layout(
-                title="Average GPA by Course Category",
-                xaxis_title="Course Category",
-                yaxis_title="Average GPA",
-                yaxis=dict(range=[0, 4.1])
-            )
-            
-            st.plotly_chart(fig_category, use_container_width=True)
+        st.plotly_chart(fig_trends, use_container_width=True, key="trends_chart")
+    
+    # Course performance by category
+    st.subheader("📚 Performance by Course Category")
+    
+    course_df = build_course_frame(
+        st.session_state.academic_record, record_fingerprint, st.session_state.program
+    )
+    category_performance = course_df.groupby('category', sort=False).agg(
+        total_qp=('qp', 'sum'),
+        credits=('credit', 'sum')
+    )
+    
+    # Non-empty: the tab has already returned when there are no courses
+    categories = category_performance.index.tolist()
+    # Credit-weighted, matching the Academic Summary category averages
+    avg_gpas = (category_performance['total_qp'] / category_performance['credits']).tolist()
+    
+    fig_category = build_category_figure(tuple(categories), tuple(avg_gpas))
+    st.plotly_chart(fig_category, use_container_width=True, key="category_chart")
+
+
+with tab3:
+    render_analytics()
 
 # Tab 4: What-If Analysis
-with tab4:
+@st.fragment
+def render_what_if():
+    """What-If Analysis tab; reruns on its own when its widgets change"""
     st.header("🔮 What-If Analysis")
     
     st.markdown("""
@@ -717,14 +875,16 @@ with tab4:
         if not st.session_state.academic_record.courses_taken:
             st.info("Add courses first to simulate retakes.")
         else:
-            completed_courses = list(st.session_state.academic_record.courses_taken.keys())
+            completed_courses = st.session_state.academic_record.get_completed_courses()
             
             with st.form("retake_simulation"):
                 st.write("Select courses to retake and their new expected GPAs:")
                 
                 retake_courses = {}
+                courses_taken = st.session_state.academic_record.courses_taken
                 
-                for i, course_code in enumerate(completed_courses[:5]):  # Limit to first 5 courses for UI
+                for course_code in completed_courses[:5]:  # Limit to first 5 courses for UI
+                    current_gpa = courses_taken[course_code].gpa
                     col1, col2, col3 = st.columns([2, 2, 1])
                     
                     with col1:
@@ -732,7 +892,6 @@ with tab4:
                     
                     with col2:
                         if retake:
-                            current_gpa = st.session_state.academic_record.courses_taken[course_code].gpa
                             new_gpa = st.number_input(
                                 f"New GPA for {course_code}:",
                                 min_value=0.0, max_value=4.0, value=min(4.0, current_gpa + 1.0),
@@ -741,9 +900,7 @@ with tab4:
                             retake_courses[course_code] = new_gpa
                     
                     with col3:
-                        if course_code in st.session_state.academic_record.courses_taken:
-                            current = st.session_state.academic_record.courses_taken[course_code].gpa
-                            st.caption(f"Current: {current:.2f}")
+                        st.caption(f"Current: {current_gpa:.2f}")
                 
                 simulate_btn = st.form_submit_button("Simulate Retakes")
                 
@@ -752,7 +909,7 @@ with tab4:
                     
                     col1, col2, col3 = st.columns(3)
                     with col1:
-                        st.metric("Current CGPA", f"{current_cgpa:.2f}")
+                        st.metric("Current CGPA", f"{st.session_state.academic_record.get_current_cgpa():.2f}")
                     with col2:
                         st.metric("Projected CGPA", f"{result['simulated_cgpa']:.2f}")
                     with col3:
@@ -770,14 +927,14 @@ with tab4:
         st.subheader("New Course Impact Analysis")
         
         with st.form("new_course_impact"):
-            all_courses = get_all_courses()
-            completed = list(st.session_state.academic_record.courses_taken.keys())
-            available = [c for c in all_courses if c not in completed]
+            available = get_cached_available_courses(
+                st.session_state.academic_record.get_completed_course_set()
+            )
             
             course_to_add = st.selectbox(
                 "Course to analyze:",
                 [""] + available,
-                format_func=lambda x: f"{x} - {COURSE_NAMES.get(x, 'Course')}" if x else "Select a course"
+                format_func=get_course_label
             )
             
             col1, col2 = st.columns(2)
@@ -809,12 +966,12 @@ with tab4:
             st.info("Add courses first to analyze grade improvements.")
         else:
             with st.form("grade_improvement"):
-                completed_courses = list(st.session_state.academic_record.courses_taken.keys())
+                completed_courses = st.session_state.academic_record.get_completed_courses()
                 
                 course_to_improve = st.selectbox(
                     "Select course to improve:",
-                    [""] + completed_courses,
-                    format_func=lambda x: f"{x} - {COURSE_NAMES.get(x, 'Course')}" if x else "Select a course"
+                    ("",) + completed_courses,
+                    format_func=get_course_label
                 )
                 
                 if course_to_improve:
@@ -842,8 +999,21 @@ with tab4:
                     else:
                         st.error(result['error'])
 
+
+with tab4:
+    render_what_if()
+
 # Tab 5: Academic Summary
-with tab5:
+@st.fragment
+def render_summary():
+    """Academic Summary tab"""
+    # Read live, since module-level totals are stale on fragment-only reruns
+    record_fingerprint, overview = get_record_overview()
+    current_cgpa = overview['current_cgpa']
+    current_credits = overview['current_credits']
+    remaining_credits = overview['remaining_credits']
+    requirements = overview['requirements']
+    
     st.header("📋 Academic Summary")
     
     # Student information
@@ -874,43 +1044,37 @@ with tab5:
         st.metric("Credits Completed", f"{current_credits}")
     
     with overview_col4:
-        remaining = requirements['total_credits'] - current_credits
-        st.metric("Credits Remaining", f"{remaining}")
+        st.metric("Credits Remaining", f"{remaining_credits}")
     
     # Course breakdown by category
     if st.session_state.academic_record.courses_taken:
         st.subheader("📚 Course Breakdown by Category")
         
-        category_data = {}
-        for course_code, course in st.session_state.academic_record.courses_taken.items():
-            category = categorize_course(course_code, st.session_state.program)
-            if category not in category_data:
-                category_data[category] = {'courses': [], 'credits': 0, 'total_qp': 0}
-            
-            category_data[category]['courses'].append({
-                'code': course_code,
-                'name': COURSE_NAMES.get(course_code, 'Unknown'),
-                'grade': course.grade,
-                'gpa': course.gpa,
-                'credits': course.credit
-            })
-            category_data[category]['credits'] += course.credit
-            category_data[category]['total_qp'] += course.get_quality_points()
+        course_df = build_course_frame(
+            st.session_state.academic_record, record_fingerprint, st.session_state.program
+        )
+        
+        category_totals = course_df.groupby('category', sort=False).agg(
+            courses=('code', 'size'),
+            credits=('credit', 'sum'),
+            total_qp=('qp', 'sum')
+        )
+        display_df = course_df[['code', 'name', 'grade', 'gpa', 'credit']].set_axis(
+            ['Course Code', 'Course Name', 'Grade', 'GPA', 'Credits'], axis=1
+        )
         
-        for category, data in category_data.items():
-            with st.expander(f"{category} ({len(data['courses'])} courses, {data['credits']} credits)"):
-                avg_gpa = data['total_qp'] / data['credits'] if data['credits'] > 0 else 0
+        for category, category_df in display_df.groupby(course_df['category'], sort=False):
+            credits = category_totals.at[category, 'credits']
+            with st.expander(f"{category} ({category_totals.at[category, 'courses']} courses, {credits} credits)"):
+                avg_gpa = category_totals.at[category, 'total_qp'] / credits if credits > 0 else 0
                 st.write(f"**Average GPA:** {avg_gpa:.2f}")
                 
-                course_df = pd.DataFrame(data['courses'])
-                course_df.columns = ['Course Code', 'Course Name', 'Grade', 'GPA', 'Credits']
-                st.dataframe(course_df, use_container_width=True, hide_index=True)
+                st.dataframe(category_df.reset_index(drop=True), use_container_width=True, hide_index=True)
     
     # General education planning
     st.subheader("🎓 General Education Planning")
     
-    completed_courses = list(st.session_state.academic_record.courses_taken.keys())
-    ge_plan = plan_general_education_courses(completed_courses)
+    ge_plan = plan_general_education_courses(st.session_state.academic_record.get_completed_course_set())
     
     ge_col1, ge_col2, ge_col3, ge_col4, ge_col5 = st.columns(5)
     
@@ -934,13 +1098,10 @@ with tab5:
     st.subheader("🎯 Degree Completion Projection")
     
     if current_credits > 0:
-        remaining_credits = requirements['total_credits'] - current_credits
-        
         if remaining_credits <= 0:
             st.success("🎉 Congratulations! You have completed all required credits!")
         else:
-            avg_credits_per_semester = 12  # Assume 4 courses * 3 credits
-            estimated_semesters = (remaining_credits + avg_credits_per_semester - 1) // avg_credits_per_semester
+            estimated_semesters = -(-remaining_credits // CREDITS_PER_SEMESTER)
             
             proj_col1, proj_col2 = st.columns(2)
             with proj_col1:
@@ -952,33 +1113,32 @@ with tab5:
             st.write("**CGPA Requirements for Target CGPAs:**")
             
             target_cgpas = [3.0, 3.25, 3.5, 3.75]
-            target_df = []
-            
-            for target in target_cgpas:
-                projection = st.session_state.calculator.calculate_cgpa_projection(
-                    target_cgpa=target, 
-                    total_required_credits=requirements["total_credits"]
-                )
+            required_gpas = st.session_state.calculator.calculate_required_gpas(
+                target_cgpas,
+                total_required_credits=requirements["total_credits"]
+            )
+            if required_gpas:
+                import pandas as pd
                 
-                if 'required_avg_gpa' in projection:
-                    required_gpa = projection['required_avg_gpa']
-                    achievable = "✅" if required_gpa <= 4.0 else "❌"
-                    target_df.append({
-                        'Target CGPA': target,
-                        'Required Average GPA': f"{required_gpa:.2f}",
-                        'Achievable': achievable
-                    })
-            
-            if target_df:
-                st.dataframe(pd.DataFrame(target_df), use_container_width=True, hide_index=True)
+                target_df = pd.DataFrame({
+                    'Target CGPA': target_cgpas,
+                    'Required Average GPA': [f"{gpa:.2f}" for gpa in required_gpas],
+                    'Achievable': ["✅" if gpa <= 4.0 else "❌" for gpa in required_gpas]
+                })
+                st.dataframe(target_df, use_container_width=True, hide_index=True)
     else:
         st.info("Add some courses to see degree completion projections!")
 
+
+with tab5:
+    render_summary()
+
 # Footer
-st.markdown("---")
-st.markdown("""
+FOOTER_HTML = """
 <div style="text-align: center; color: #666; padding: 2rem 0;">
 <p>🎓 CGPA Projection Tool | Plan Smart • Study Hard • Achieve More</p>
 <p><small>Built for academic success</small></p>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+"""
+st.markdown("---")
+st.markdown(FOOTER_HTML, unsafe_allow_html=True)
\ No newline at end of file
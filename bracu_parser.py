@@ -15,7 +15,11 @@ import re
 import logging
 import tempfile
 import os
-from typing import Dict, List, Tuple, Optional
+import hashlib
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, List, Sequence, Tuple, Optional
 from course_utils import Course, Semester, AcademicRecord
 
 # Configure logging
@@ -27,33 +31,43 @@ class BRACUParser:
     BRACU-specific gradesheet parser that follows the official transcript format
     """
     
+    # Precompiled numeric checks so line classification avoids float() exceptions
+    _GPA_RE = re.compile(r'^(?:[0-3]\.\d*|4\.0*)$')
+    _NUM_RE = re.compile(r'^-?\d+(?:\.\d*)?$')
+    
+    # Failed/incomplete grades that are not counted (as per BRACU analyzer)
+    _SKIP_GRADES = frozenset({"F", "I", "W"})
+    
+    # Number of distinct gradesheets whose cleaned lines are kept in memory
+    _LINE_CACHE_SIZE = 32
+    
+    # Letter grade to GPA, built once for every _grade_to_gpa lookup
+    _GRADE_TO_GPA = {
+        'A+': 4.0, 'A': 4.0, 'A-': 3.7,
+        'B+': 3.3, 'B': 3.0, 'B-': 2.7,
+        'C+': 2.3, 'C': 2.0, 'C-': 1.7,
+        'D+': 1.3, 'D': 1.0, 'F': 0.0,
+        'W': 0.0, 'I': 0.0
+    }
+    
     def __init__(self):
         # BRACU-specific filtering sets
-        self.to_remove = {
+        self.to_remove = frozenset({
             'BRAC University', '', 'Kha 224, Bir Uttam Rafiqul Islam Avenue ', 
             'Merul Badda, Dhaka 1212.', '', 'Page 1 of 2', '', ' ', '', 
             'GRADE SHEET', '', 'UNOFFICIAL COPY', '', 'UNDERGRADUATE PROGRAM ', '',
-        }
+        })
         
-        self.valid_grades = [
+        self.valid_grades = frozenset({
             "A+", "A", "A-", "B+", "B", "B-", "C+", "C", "C-", "D+", "D", "F", "W", "I"
-        ]
+        })
         
-        # Course code pattern for validation
-        self.course_pattern = re.compile(r'^[A-Z]{3}\d{3}$')
+        # Course code pattern for validation; every known BRACU code matches it
+        self.course_pattern = re.compile(r'^[A-Z]{3}\d{3}\Z')
         
-        # Course prerequisites from BRACU data
-        self.course_codes = {
-            "STA201", "HUM103", "BNG103", "EMB101", "MAT110", "MAT120", "MAT215", "MAT216", 
-            "PHY111", "PHY112", "ENG101", "ENG102", "ENG103", "CSE110", "CSE111", "CSE220", 
-            "CSE221", "CSE230", "CSE250", "CSE251", "CSE260", "CSE320", "CSE321", "CSE330", 
-            "CSE331", "CSE340", "CSE341", "CSE350", "CSE360", "CSE370", "CSE420", "CSE421", 
-            "CSE422", "CSE423", "CSE460", "CSE461", "CSE470", "CSE471", "CSE400", "CHE101", 
-            "BIO101", "ENV103", "PSY101", "SOC101", "ANT101", "POL101", "BUS201", "ECO101", 
-            "ECO102", "HUM101", "HUM102", "HST102", "HST104", "HUM207", "ENG113", "ENG114", 
-            "ENG115", "ENG333", "CST301", "CST302", "CST303", "CST304", "CST305", "CST306", 
-            "CST307", "CST308", "CST309", "CST310"
-        }
+        # Cleaned lines keyed by PDF content hash, so re-uploads skip text extraction
+        self._line_cache = OrderedDict()
+        self._line_cache_lock = threading.Lock()
     
     def extract_gradesheet(self, pdf_path: str) -> Tuple[Optional[str], Optional[str], Dict, Dict]:
         """
@@ -68,29 +82,7 @@ class BRACUParser:
         name, student_id = None, None
         
         try:
-            # Open PDF document
-            doc = fitz.open(pdf_path)
-            full_text = ""
-            
-            # Extract text from all pages
-            for page in doc:
-                blocks = page.get_text("blocks")
-                # Sort blocks by position (top to bottom, left to right)
-                blocks = sorted(blocks, key=lambda b: (b[1], b[0]))
-                for block in blocks:
-                    full_text += block[4] + "\n"
-            
-            doc.close()
-            
-            # Split into lines and clean
-            lines = full_text.splitlines()
-            
-            # Remove unwanted lines
-            cleaned_lines = []
-            for line in lines:
-                line = line.strip()
-                if line and line not in self.to_remove:
-                    cleaned_lines.append(line)
+            cleaned_lines = self._get_cleaned_lines(pdf_path)
             
             # Parse the content using BRACU format
             name, student_id, courses_done, semesters_done = self._parse_bracu_format(cleaned_lines)
@@ -104,139 +96,210 @@ class BRACUParser:
             logger.error(f"Error parsing BRACU gradesheet: {str(e)}")
             raise Exception(f"Failed to parse gradesheet: {str(e)}")
     
-    def _parse_bracu_format(self, lines: List[str]) -> Tuple[Optional[str], Optional[str], Dict, Dict]:
+    def _get_cleaned_lines(self, pdf_path: str) -> Tuple[str, ...]:
+        """Get the filtered, stripped text lines of a PDF, memoized by file content"""
+        # Read the file once; the same bytes feed the cache key and the PDF backend
+        with open(pdf_path, "rb") as f:
+            pdf_bytes = f.read()
+        file_hash = hashlib.blake2b(pdf_bytes, digest_size=16).hexdigest()
+        
+        with self._line_cache_lock:
+            cleaned_lines = self._line_cache.get(file_hash)
+            if cleaned_lines is not None:
+                self._line_cache.move_to_end(file_hash)
+                logger.info("Reusing extracted text for previously parsed gradesheet")
+                return cleaned_lines
+        
+        # Split into lines and remove unwanted lines
+        lines = self._extract_text(pdf_bytes).splitlines()
+        to_remove = self.to_remove
+        cleaned_lines = tuple(line for line in map(str.strip, lines) if line and line not in to_remove)
+        
+        with self._line_cache_lock:
+            self._line_cache[file_hash] = cleaned_lines
+            if len(self._line_cache) > self._LINE_CACHE_SIZE:
+                self._line_cache.popitem(last=False)
+        
+        return cleaned_lines
+    
+    def _extract_text(self, pdf_bytes: bytes) -> str:
+        """Extract the text of all pages as one string with PyMuPDF"""
+        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        try:
+            # One line per block, so each table cell stays on its own line; sorted by
+            # position (top to bottom, left to right). MuPDF's own sort=True orders by
+            # block bottom instead, which puts cells of one row in a different order.
+            parts = []
+            for page in doc:
+                for block in sorted(page.get_text("blocks"), key=lambda b: (b[1], b[0])):
+                    parts.append(block[4])
+                    parts.append("\n")
+            return "".join(parts)
+        finally:
+            doc.close()
+    
+    def _parse_bracu_format(self, lines: Sequence[str]) -> Tuple[Optional[str], Optional[str], Dict, Dict]:
         """Parse lines following exact BRACU gradesheet format"""
         courses_done = {}
         semesters_done = {}
         name, student_id = None, None
         
+        # Header labels are followed by a ":" line and then their value
+        n = len(lines)
+        
+        # Each semester's courses end at the next CGPA line
+        cgpa_positions = [idx for idx, line in enumerate(lines) if line == "CGPA"]
         i = 0
-        while i < len(lines):
-            try:
-                line = lines[i]
-                
-                # Extract student name
-                if line == "Name" and name is None:
-                    i += 1
-                    if i < len(lines) and lines[i].strip():
-                        i += 1
-                        if i < len(lines):
-                            name = lines[i]
-                            logger.info(f"Found student name: {name}")
-                
-                # Extract student ID
-                elif line == "Student ID" and student_id is None:
-                    i += 1
-                    if i < len(lines) and lines[i].strip():
-                        i += 1
-                        if i < len(lines):
-                            student_id = lines[i]
-                            logger.info(f"Found student ID: {student_id}")
-                
-                # Parse semester data
-                elif line == "SEMESTER:":
-                    i += 1
-                    if i < len(lines):
-                        current_semester = lines[i]
-                        logger.info(f"Processing semester: {current_semester}")
-                        
-                        # Create semester object
-                        semester_obj = Semester(current_semester)
-                        semesters_done[current_semester] = semester_obj
-                        
-                        # Parse courses in this semester
-                        i = self._parse_semester_courses(lines, i, current_semester, courses_done, semester_obj)
-                
-                i += 1
-                
-            except Exception as e:
-                logger.warning(f"Error parsing line {i}: {line} - {str(e)}")
+        while i < n:
+            line = lines[i]
+            
+            # Parse semester data
+            if line == "SEMESTER:":
                 i += 1
+                if i < n:
+                    current_semester = lines[i]
+                    logger.info(f"Processing semester: {current_semester}")
+                    
+                    # Create semester object
+                    semester_obj = Semester(current_semester)
+                    semesters_done[current_semester] = semester_obj
+                    
+                    # Parse courses in this semester; returns the index of its CGPA line
+                    next_cgpa = bisect_right(cgpa_positions, i)
+                    end_idx = cgpa_positions[next_cgpa] if next_cgpa < len(cgpa_positions) else n
+                    i = self._parse_semester_courses(lines, i, end_idx, current_semester, courses_done, semester_obj)
+            
+            # Extract student name
+            elif line == "Name" and name is None:
+                i += 2
+                if i < n:
+                    name = lines[i]
+                    logger.info(f"Found student name: {name}")
+            
+            # Extract student ID
+            elif line == "Student ID" and student_id is None:
+                i += 2
+                if i < n:
+                    student_id = lines[i]
+                    logger.info(f"Found student ID: {student_id}")
+            
+            i += 1
         
         return name, student_id, courses_done, semesters_done
     
-    def _parse_semester_courses(self, lines: List[str], start_idx: int, semester: str, 
+    def _parse_semester_courses(self, lines: Sequence[str], start_idx: int, end_idx: int, semester: str, 
                                courses_done: Dict, semester_obj: Semester) -> int:
-        """Parse courses within a semester following BRACU format"""
+        """Parse courses within a semester following BRACU format, up to its CGPA line at end_idx"""
+        debug = logger.isEnabledFor(logging.DEBUG)  # skip formatting debug messages when filtered out
+        
+        # Bind lookups used on every line to locals
+        n = len(lines)
+        valid_grades = self.valid_grades
+        skip_grades = self._SKIP_GRADES
+        match_course_code = self.course_pattern.match
+        is_gpa_value = self._is_gpa_value
+        is_number = self._is_number
+        grade_to_gpa = self._grade_to_gpa
+        
         i = start_idx + 1
         
-        logger.debug(f"Starting course parsing for {semester} at line {i}")
+        if debug:
+            logger.debug(f"Starting course parsing for {semester} at line {i}")
         
-        while i < len(lines) and lines[i] != "CGPA":
+        while i < end_idx:
             try:
                 line = lines[i]
-                logger.debug(f"Examining line {i}: '{line}'")
+                if debug:
+                    logger.debug(f"Examining line {i}: '{line}'")
                 
                 # Check if this is a valid BRACU course code
-                if line in self.course_codes or self.course_pattern.match(line):
+                if match_course_code(line):
                     course_code = line
-                    logger.debug(f"Found potential course: {course_code}")
+                    if debug:
+                        logger.debug(f"Found potential course: {course_code}")
                     
                     # Look ahead for grade information
                     j = i + 1
                     is_nt = False  # No Transfer
                     is_repeat = False
+                    marked_token = None  # line at j with its repeat marker dropped
                     
-                    logger.debug(f"Looking for grade starting at line {j}")
+                    if debug:
+                        logger.debug(f"Looking for grade starting at line {j}")
                     
                     # Check for special markers and find grade
-                    while j < len(lines) and lines[j] not in self.valid_grades:
-                        logger.debug(f"Checking line {j}: '{lines[j]}'")
-                        if "(NT)" in lines[j]:
+                    while j < end_idx and lines[j] not in valid_grades:
+                        candidate = lines[j]
+                        if debug:
+                            logger.debug(f"Checking line {j}: '{candidate}'")
+                        
+                        # Transcript markers trail the cell text
+                        if candidate.endswith("(NT)"):
                             is_nt = True
-                            logger.debug("Found NT marker")
+                            if debug:
+                                logger.debug("Found NT marker")
                             break
-                        elif "(RP)" in lines[j] or "(RT)" in lines[j]:
-                            # Handle repeat courses
-                            hold = lines[j].split()
-                            if hold:
-                                lines[j] = hold[0]
+                        elif candidate.endswith(("(RP)", "(RT)")):
+                            # Handle repeat courses; lines itself is left untouched
+                            marked_token = candidate.split(None, 1)[0]
                             is_repeat = True
-                            logger.debug("Found repeat marker")
+                            if debug:
+                                logger.debug("Found repeat marker")
                             break
                         j += 1
                         
                         # Safety check to avoid infinite loop
                         if j - i > 10:
-                            logger.debug("Breaking search - too many lines ahead")
+                            if debug:
+                                logger.debug("Breaking search - too many lines ahead")
                             break
                     
                     # Skip NT (No Transfer) courses
                     if is_nt:
-                        logger.debug(f"Skipping NT course: {course_code}")
+                        if debug:
+                            logger.debug(f"Skipping NT course: {course_code}")
                         i = j + 1
                         continue
                     
                     # Check if we found a valid grade
-                    if j < len(lines) and lines[j] in self.valid_grades:
-                        grade = lines[j]
-                        logger.debug(f"Found grade: {grade}")
+                    if marked_token is not None:
+                        grade = marked_token
+                    else:
+                        grade = lines[j] if j < end_idx else None
+                    if grade in valid_grades:
+                        if debug:
+                            logger.debug(f"Found grade: {grade}")
                         
                         # Skip failed/incomplete courses (as per BRACU analyzer)
-                        if grade in {"F", "I", "W"}:
-                            logger.debug(f"Skipping failed/incomplete course: {course_code} ({grade})")
+                        if grade in skip_grades:
+                            if debug:
+                                logger.debug(f"Skipping failed/incomplete course: {course_code} ({grade})")
                             i = j + 1
                             continue
                         
                         try:
                             # Look for credit value (should be before the grade)
                             credit = 3.0  # Default credit
-                            if j > 0 and self._is_number(lines[j - 1]):
+                            if j > 0 and is_number(lines[j - 1]):
                                 credit = float(lines[j - 1])
-                                logger.debug(f"Found credit from previous line: {credit}")
+                                if debug:
+                                    logger.debug(f"Found credit from previous line: {credit}")
                             elif course_code == "CSE400":
                                 credit = 4.0  # CSE400 is typically 4 credits
-                                logger.debug("Using CSE400 special credit: 4.0")
+                                if debug:
+                                    logger.debug("Using CSE400 special credit: 4.0")
                             
                             # Look for GPA value (should be after the grade)
                             gpa = 0.0
-                            if j + 1 < len(lines) and self._is_gpa_value(lines[j + 1]):
+                            if j + 1 < end_idx and is_gpa_value(lines[j + 1]):
                                 gpa = float(lines[j + 1])
-                                logger.debug(f"Found GPA from next line: {gpa}")
+                                if debug:
+                                    logger.debug(f"Found GPA from next line: {gpa}")
                             else:
                                 # Calculate GPA from grade
-                                gpa = self._grade_to_gpa(grade)
-                                logger.debug(f"Calculated GPA from grade: {gpa}")
+                                gpa = grade_to_gpa(grade)
+                                if debug:
+                                    logger.debug(f"Calculated GPA from grade: {gpa}")
                             
                             # Create course object
                             course = Course(
@@ -257,7 +320,8 @@ class BRACUParser:
                             logger.warning(f"Error parsing course {course_code}: {str(e)}")
                             i += 1
                     else:
-                        logger.debug(f"No valid grade found for {course_code} at line {j}")
+                        if debug:
+                            logger.debug(f"No valid grade found for {course_code} at line {j}")
                         i += 1
                 else:
                     i += 1
@@ -266,25 +330,29 @@ class BRACUParser:
                 logger.warning(f"Error in semester course parsing at line {i}: {str(e)}")
                 i += 1
         
-        logger.debug(f"Finished parsing {semester} with {len(semester_obj.courses)} courses")
+        if debug:
+            logger.debug(f"Finished parsing {semester} with {len(semester_obj.courses)} courses")
         
-        # Parse semester GPA and CGPA
-        if i < len(lines) and lines[i] == "CGPA":
+        # Parse semester GPA and CGPA; a course ending right before CGPA can step past it
+        i = end_idx
+        if i < n:
             try:
                 # Look for semester GPA (usually appears before CGPA)
                 gpa_idx = i - 1
-                while gpa_idx > start_idx and not self._is_gpa_value(lines[gpa_idx]):
+                while gpa_idx > start_idx and not is_gpa_value(lines[gpa_idx]):
                     gpa_idx -= 1
                 
-                if gpa_idx > start_idx and self._is_gpa_value(lines[gpa_idx]):
+                if gpa_idx > start_idx and is_gpa_value(lines[gpa_idx]):
                     semester_gpa = float(lines[gpa_idx])
                     semester_obj.gpa = semester_gpa
-                    logger.debug(f"Set semester GPA: {semester_gpa}")
+                    if debug:
+                        logger.debug(f"Set semester GPA: {semester_gpa}")
                 
                 # Get CGPA
-                if i + 1 < len(lines) and self._is_gpa_value(lines[i + 1]):
+                if i + 1 < n and is_gpa_value(lines[i + 1]):
                     cgpa = float(lines[i + 1])
-                    logger.debug(f"Found CGPA: {cgpa}")
+                    if debug:
+                        logger.debug(f"Found CGPA: {cgpa}")
                     
             except (ValueError, IndexError) as e:
                 logger.warning(f"Error parsing semester GPA/CGPA: {str(e)}")
@@ -293,30 +361,15 @@ class BRACUParser:
     
     def _is_gpa_value(self, text: str) -> bool:
         """Check if text looks like a GPA value (0.00 to 4.00)"""
-        try:
-            val = float(text)
-            return 0.0 <= val <= 4.0 and '.' in text
-        except:
-            return False
+        return self._GPA_RE.match(text) is not None
     
     def _is_number(self, text: str) -> bool:
         """Check if text is a number"""
-        try:
-            float(text)
-            return True
-        except:
-            return False
+        return self._NUM_RE.match(text) is not None
     
     def _grade_to_gpa(self, grade: str) -> float:
         """Convert letter grade to GPA"""
-        grade_mapping = {
-            'A+': 4.0, 'A': 4.0, 'A-': 3.7,
-            'B+': 3.3, 'B': 3.0, 'B-': 2.7,
-            'C+': 2.3, 'C': 2.0, 'C-': 1.7,
-            'D+': 1.3, 'D': 1.0, 'F': 0.0,
-            'W': 0.0, 'I': 0.0
-        }
-        return grade_mapping.get(grade, 0.0)
+        return BRACUParser._GRADE_TO_GPA.get(grade, 0.0)
     
     def parse_gradesheet_smart(self, pdf_path: str) -> Optional[AcademicRecord]:
         """
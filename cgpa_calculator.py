@@ -2,9 +2,23 @@
 CGPA Calculator and Projection Utilities
 """
 
+import numpy as np
+
 from course_utils import Course, AcademicRecord, calculate_grade_points
 
 
+def _project(current_credits, current_quality_points, added_credits, target_cgpa=None):
+    """Max CGPA with 4.0 in the added credits, and the average GPA they need to reach the target"""
+    total_credits = current_credits + added_credits
+    max_cgpa = (current_quality_points + added_credits * 4.0) / total_credits if total_credits > 0 else 0.0
+    
+    required_avg_gpa = None
+    if target_cgpa is not None and added_credits > 0:
+        required_avg_gpa = (target_cgpa * total_credits - current_quality_points) / added_credits
+    
+    return max_cgpa, required_avg_gpa
+
+
 class CGPACalculator:
     """Main class for CGPA calculations and projections"""
     
@@ -27,17 +41,16 @@ class CGPACalculator:
     def calculate_cgpa_projection(self, target_cgpa=None, total_required_credits=136):
         """Calculate maximum possible CGPA and projection to target"""
         current_credits = self.academic_record.get_total_credits()
-        current_quality_points = sum(
-            course.get_quality_points() 
-            for course in self.academic_record.courses_taken.values()
-        )
+        current_quality_points = self.academic_record.get_total_quality_points()
         
         remaining_credits = max(total_required_credits - current_credits, 0)
-        total_credits = current_credits + remaining_credits
+        if target_cgpa is not None:
+            target_cgpa = round(target_cgpa, 2)
         
         # Maximum possible CGPA (assuming 4.0 in all remaining courses)
-        max_possible_quality_points = current_quality_points + (remaining_credits * 4.0)
-        max_possible_cgpa = max_possible_quality_points / total_credits if total_credits > 0 else 0.0
+        max_possible_cgpa, required_avg_gpa = _project(
+            current_credits, current_quality_points, remaining_credits, target_cgpa
+        )
         
         result = {
             'current_cgpa': self.academic_record.get_current_cgpa(),
@@ -48,10 +61,6 @@ class CGPACalculator:
         
         # Calculate requirements for target CGPA
         if target_cgpa is not None:
-            target_cgpa = round(target_cgpa, 2)
-            required_total_quality_points = target_cgpa * total_credits
-            needed_quality_points = required_total_quality_points - current_quality_points
-            
             if remaining_credits <= 0:
                 result['message'] = "All credits completed. Cannot improve CGPA further."
             elif max_possible_cgpa <= target_cgpa:
@@ -60,19 +69,30 @@ class CGPACalculator:
             elif max_possible_cgpa < target_cgpa:
                 result['message'] = f"Target CGPA of {target_cgpa} is not achievable. Max possible CGPA is {round(max_possible_cgpa, 2)}."
             else:
-                required_avg_gpa = needed_quality_points / remaining_credits
                 result['required_avg_gpa'] = round(required_avg_gpa, 2)
                 result['message'] = f"To reach CGPA {target_cgpa}, you need to average {round(required_avg_gpa, 2)} GPA over the remaining {remaining_credits} credits."
         
         return result
     
+    def calculate_required_gpas(self, target_cgpas, total_required_credits=136):
+        """Required average GPA over the remaining credits for each target CGPA"""
+        current_credits = self.academic_record.get_total_credits()
+        current_quality_points = self.academic_record.get_total_quality_points()
+        
+        remaining_credits = total_required_credits - current_credits
+        if remaining_credits <= 0:
+            return []
+        
+        targets = np.round(np.asarray(target_cgpas, dtype=float), 2)
+        required = (targets * total_required_credits - current_quality_points) / remaining_credits
+        
+        # Unreachable targets are capped at 4.0, as in calculate_cgpa_projection
+        return [round(gpa, 2) for gpa in np.minimum(required, 4.0).tolist()]
+    
     def calculate_semester_planning(self, target_cgpa=None, num_semesters=0, courses_per_semester=0, total_required_credits=136):
         """Calculate CGPA planning for future semesters"""
         current_credits = self.academic_record.get_total_credits()
-        current_quality_points = sum(
-            course.get_quality_points() 
-            for course in self.academic_record.courses_taken.values()
-        )
+        current_quality_points = self.academic_record.get_total_quality_points()
         
         remaining_credits = total_required_credits - current_credits
         planned_courses = num_semesters * courses_per_semester
@@ -82,10 +102,14 @@ class CGPACalculator:
         planned_courses = min(planned_courses, max_possible_courses)
         planned_credits = min(planned_courses * 3, remaining_credits)
         
+        if target_cgpa is not None:
+            target_cgpa = round(target_cgpa, 2)
+        
         # Calculate max possible CGPA with planned courses
-        total_quality_points_max = current_quality_points + (planned_credits * 4.0)
-        total_credits = current_credits + planned_credits
-        max_possible_cgpa = round(total_quality_points_max / total_credits, 2) if total_credits > 0 else 0.0
+        max_possible_cgpa, required_avg_gpa = _project(
+            current_credits, current_quality_points, planned_credits, target_cgpa
+        )
+        max_possible_cgpa = round(max_possible_cgpa, 2)
         
         result = {
             'planned_courses': planned_courses,
@@ -95,18 +119,13 @@ class CGPACalculator:
         
         # Calculate requirements for target CGPA
         if target_cgpa is not None and planned_credits > 0:
-            target_cgpa = round(target_cgpa, 2)
-            required_total_quality_points = target_cgpa * total_credits
-            needed_quality_points = required_total_quality_points - current_quality_points
-            
             if max_possible_cgpa < target_cgpa:
-                result['required_avg_gpa'] = round(needed_quality_points / planned_credits, 2)
+                result['required_avg_gpa'] = round(required_avg_gpa, 2)
                 result['message'] = f"Target CGPA of {target_cgpa} is not achievable with current plan. Required GPA: {result['required_avg_gpa']}."
             elif max_possible_cgpa == target_cgpa:
                 result['required_avg_gpa'] = 4.0
                 result['message'] = f"To reach CGPA {target_cgpa}, you must get 4.00 GPA in all planned courses."
             else:
-                required_avg_gpa = needed_quality_points / planned_credits
                 result['required_avg_gpa'] = round(required_avg_gpa, 2)
                 result['message'] = f"To reach CGPA {target_cgpa}, you must average {round(required_avg_gpa, 2)} GPA in the next {planned_courses} courses ({planned_credits} credits)."
         elif planned_credits <= 0:
@@ -116,17 +135,17 @@ class CGPACalculator:
     
     def simulate_retakes(self, retake_grades):
         """Simulate the effect of retaking courses with new grades"""
-        total_quality_points = 0
-        total_credits = 0
+        course_index = self.academic_record.get_course_index()
+        retaken = [code for code in retake_grades if code in course_index]
+        positions = [course_index[code] for code in retaken]
         
-        for course_code, course in self.academic_record.courses_taken.items():
-            if course_code in retake_grades:
-                simulated_gpa = retake_grades[course_code]
-                total_quality_points += simulated_gpa * course.credit
-            else:
-                total_quality_points += course.get_quality_points()
-            total_credits += course.credit
+        # Apply only the retaken courses' change to the cached total, so an empty retake is a no-op
+        new_gpas = np.array([retake_grades[code] for code in retaken], dtype=float)
+        old_gpas = self.academic_record.get_gpa_array()[positions]
+        credits = self.academic_record.get_credit_array()[positions]
+        total_quality_points = self.academic_record.get_total_quality_points() + float(np.dot(new_gpas - old_gpas, credits))
         
+        total_credits = self.academic_record.get_total_credits()
         new_cgpa = round(total_quality_points / total_credits, 2) if total_credits > 0 else 0.0
         return {
             'simulated_cgpa': new_cgpa,
@@ -166,21 +185,38 @@ class CGPACalculator:
     
     def get_performance_stats(self):
         """Get comprehensive performance statistics"""
-        courses = list(self.academic_record.courses_taken.values())
+        courses = self.academic_record.courses_taken
         if not courses:
             return {}
         
-        gpas = [course.gpa for course in courses if course.gpa > 0]
+        # One pass over the graded (non-zero) GPAs
+        highest = lowest = None
+        gpa_sum = 0
+        graded = above_3_5 = below_2_0 = 0
+        for course in courses.values():
+            gpa = course.gpa
+            if gpa <= 0:
+                continue
+            if highest is None or gpa > highest:
+                highest = gpa
+            if lowest is None or gpa < lowest:
+                lowest = gpa
+            gpa_sum += gpa
+            graded += 1
+            if gpa >= 3.5:
+                above_3_5 += 1
+            elif gpa < 2.0:
+                below_2_0 += 1
         
         stats = {
             'total_courses': len(courses),
-            'total_credits': sum(course.credit for course in courses),
+            'total_credits': self.academic_record.get_total_credits(),
             'current_cgpa': self.academic_record.get_current_cgpa(),
-            'highest_gpa': max(gpas) if gpas else 0,
-            'lowest_gpa': min(gpas) if gpas else 0,
-            'average_gpa': round(sum(gpas) / len(gpas), 2) if gpas else 0,
-            'courses_above_3_5': len([gpa for gpa in gpas if gpa >= 3.5]),
-            'courses_below_2_0': len([gpa for gpa in gpas if gpa < 2.0])
+            'highest_gpa': highest if graded else 0,
+            'lowest_gpa': lowest if graded else 0,
+            'average_gpa': round(gpa_sum / graded, 2) if graded else 0,
+            'courses_above_3_5': above_3_5,
+            'courses_below_2_0': below_2_0
         }
         
         return stats
@@ -192,20 +228,24 @@ class WhatIfAnalyzer:
     def __init__(self, cgpa_calculator):
         self.calculator = cgpa_calculator
     
+    def analyze_course_addition_batch(self, gpas, credits):
+        """Unrounded projected CGPA for each (gpa, credit) pair of a hypothetical added course"""
+        record = self.calculator.academic_record
+        gpas = np.asarray(gpas, dtype=float)
+        credits = np.asarray(credits, dtype=float)
+        new_total_credits = record.get_total_credits() + credits
+        
+        projected = np.zeros(np.broadcast(gpas, credits).shape)
+        np.divide(record.get_total_quality_points() + gpas * credits, new_total_credits,
+                  out=projected, where=new_total_credits > 0)
+        return projected
+    
     def analyze_course_addition(self, course_code, gpa, credit=3):
         """Analyze impact of adding a new course"""
         current_cgpa = self.calculator.academic_record.get_current_cgpa()
-        current_credits = self.calculator.academic_record.get_total_credits()
         
         # Calculate new CGPA with added course
-        current_quality_points = sum(
-            course.get_quality_points() 
-            for course in self.calculator.academic_record.courses_taken.values()
-        )
-        
-        new_quality_points = current_quality_points + (gpa * credit)
-        new_total_credits = current_credits + credit
-        new_cgpa = round(new_quality_points / new_total_credits, 2) if new_total_credits > 0 else 0.0
+        new_cgpa = round(float(self.analyze_course_addition_batch(gpa, credit)), 2)
         
         return {
             'current_cgpa': current_cgpa,
@@ -226,10 +266,7 @@ class WhatIfAnalyzer:
         current_cgpa = self.calculator.academic_record.get_current_cgpa()
         
         # Calculate CGPA with improved grade
-        current_quality_points = sum(
-            course.get_quality_points() 
-            for course in self.calculator.academic_record.courses_taken.values()
-        )
+        current_quality_points = self.calculator.academic_record.get_total_quality_points()
         current_credits = self.calculator.academic_record.get_total_credits()
         
         # Remove original contribution and add new
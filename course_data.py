@@ -3,9 +3,14 @@ Course Data and University Configuration
 Contains course prerequisites, categories, and grading systems
 """
 
+from functools import lru_cache
+
 # Grading system
 GRADES = ["A+", "A", "A-", "B+", "B", "B-", "C+", "C", "C-", "D+", "D", "F", "W", "I"]
 
+# Position of each grade in GRADES (for selectbox defaults)
+GRADE_INDEX = {grade: i for i, grade in enumerate(GRADES)}
+
 GRADE_POINTS = {
     "A+": 4.0, "A": 4.0, "A-": 3.7,
     "B+": 3.3, "B": 3.0, "B-": 2.7,
@@ -87,61 +92,96 @@ COURSE_PREREQUISITES = {
     "CST306": [], "CST307": [], "CST308": [], "CST309": [], "CST310": [],
 }
 
+# Reverse of COURSE_PREREQUISITES (course -> frozenset of courses it requires), built once
+def _build_course_requirements():
+    requirements = {}
+    for course, unlocks_list in COURSE_PREREQUISITES.items():
+        for unlocked_course in unlocks_list:
+            requirements.setdefault(unlocked_course, []).append(course)
+    return {course: frozenset(prereqs) for course, prereqs in requirements.items()}
+
+COURSE_REQUIREMENTS = _build_course_requirements()
+
+# Every course each course transitively requires, built once (the prerequisite graph is a DAG)
+def _build_prereq_closure():
+    closure = {}
+    
+    def visit(course):
+        if course not in closure:
+            required = set()
+            for prereq in COURSE_REQUIREMENTS.get(course, ()):
+                required.add(prereq)
+                required |= visit(prereq)
+            closure[course] = frozenset(required)
+        return closure[course]
+    
+    for course in COURSE_PREREQUISITES.keys() | COURSE_REQUIREMENTS.keys():
+        visit(course)
+    return closure
+
+_PREREQ_CLOSURE = _build_prereq_closure()
+
+# Courses with prerequisite data, in the order get_unlocked_courses returns them
+_ALL_COURSE_CODES_SORTED = tuple(sorted(COURSE_PREREQUISITES))
+
+# Courses that nothing unlocks, so they are always available
+_NO_PREREQ_COURSES = frozenset(c for c in COURSE_PREREQUISITES if c not in COURSE_REQUIREMENTS)
+
 # Course Categories
-CORE_CSE_COURSES = {
+CORE_CSE_COURSES = frozenset({
     "CSE110", "CSE111", "CSE220", "CSE221", "CSE230", "CSE250", 
     "CSE251", "CSE260", "CSE320", "CSE321", "CSE330", "CSE331", 
     "CSE340", "CSE341", "CSE350", "CSE360", "CSE370", "CSE420", 
     "CSE421", "CSE422", "CSE423", "CSE460", "CSE461", "CSE470", "CSE471"
-}
+})
 
 CORE_CS_COURSES = CORE_CSE_COURSES - {"CSE250", "CSE251", "CSE320", "CSE341", "CSE350", "CSE360"}
 
-CSE_ELECTIVES = {
+CSE_ELECTIVES = frozenset({
     "CSE310", "CSE342", "CSE371", "CSE390", "CSE391", "CSE392", 
     "CSE410", "CSE419", "CSE424", "CSE425", "CSE426", "CSE427", 
     "CSE428", "CSE429", "CSE430", "CSE431", "CSE432", "CSE462", 
     "CSE472", "CSE473", "CSE474", "CSE490", "CSE491"
-}
+})
 
 # Compulsory General Education courses
-COMPULSORY_GENERAL_ED = {
+COMPULSORY_GENERAL_ED = frozenset({
     "PHY111", "PHY112", "ENG101", "ENG102", "MAT110", "MAT120", 
     "MAT215", "MAT216", "STA201", "HUM103", "BNG103", "EMB101"
-}
+})
 
 # TARC courses (Transfer And Readmission Credit)
-TARC_COURSES = {"HUM103", "BNG103", "EMB101", "ENG102"}
+TARC_COURSES = frozenset({"HUM103", "BNG103", "EMB101", "ENG102"})
 
 # Science stream courses
-SCIENCE_STREAM = {"CHE101", "BIO101", "ENV103"}
+SCIENCE_STREAM = frozenset({"CHE101", "BIO101", "ENV103"})
 
 # Arts stream courses  
-ARTS_STREAM = {
+ARTS_STREAM = frozenset({
     "HUM101", "HUM102", "HST102", "HST104", "HUM207",
     "ENG113", "ENG114", "ENG115", "ENG333", "ENG103"
-}
+})
 
 # Social Science stream courses
-SOCIAL_SCIENCE_STREAM = {
+SOCIAL_SCIENCE_STREAM = frozenset({
     "PSY101", "SOC101", "ANT101", "POL101", "BUS201", 
     "ECO101", "ECO102", "ECO105", "BUS102", "POL102", 
     "DEV104", "POL201", "SOC201", "ANT342", "ANT351", "BUS333"
-}
+})
 
 # CST stream courses
-CST_STREAM = {
+CST_STREAM = frozenset({
     "CST301", "CST302", "CST303", "CST304", "CST305",
     "CST306", "CST307", "CST308", "CST309", "CST310"
-}
+})
 
 # Lab courses (typically 1 credit)
-LAB_COURSES = {
+LAB_COURSES = frozenset({
     "CSE110", "CSE111", "CSE220", "CSE221", "CSE230", "CSE250", 
     "CSE251", "CSE260", "CSE321", "CSE330", "CSE341", "CSE350", 
     "CSE360", "CSE370", "CSE420", "CSE421", "CSE422", "CSE423", 
     "CSE460", "CSE461", "CSE471", "PHY111", "PHY112", "MAT120"
-}
+})
 
 # Course names mapping
 COURSE_NAMES = {
@@ -200,12 +240,61 @@ COURSE_NAMES = {
     "ENV103": "Environmental Science",
 }
 
+# All known courses (prerequisite data plus every category), sorted once
+_ALL_COURSES_SORTED = tuple(sorted(
+    COURSE_PREREQUISITES.keys() | CORE_CSE_COURSES | CSE_ELECTIVES | COMPULSORY_GENERAL_ED
+    | SCIENCE_STREAM | ARTS_STREAM | SOCIAL_SCIENCE_STREAM | CST_STREAM
+))
+
+# Category of each known course per program, filled in priority order so a course
+# listed in several categories keeps the first
+def _build_category_map(core_courses):
+    category_map = {}
+    for category, courses in (
+        ("Core", core_courses),
+        ("Compulsory General Education", COMPULSORY_GENERAL_ED),
+        ("CSE Elective", CSE_ELECTIVES),
+        ("Science Stream", SCIENCE_STREAM),
+        ("Arts Stream", ARTS_STREAM),
+        ("Social Science Stream", SOCIAL_SCIENCE_STREAM),
+        ("CST Stream", CST_STREAM),
+    ):
+        for course in courses:
+            category_map.setdefault(course, category)
+    return category_map
+
+_CATEGORY_FOR_CSE = _build_category_map(CORE_CSE_COURSES)
+_CATEGORY_FOR_CS = _build_category_map(CORE_CS_COURSES)
+
+# Program credit requirements
+_CSE_REQUIREMENTS = {
+    "total_credits": 136,
+    "core_credits": len(CORE_CSE_COURSES) * 3 + 4,  # +4 for CSE400
+    "general_ed_credits": 36,
+    "elective_credits": 18
+}
+
+_CS_REQUIREMENTS = {
+    "total_credits": 124,
+    "core_credits": len(CORE_CS_COURSES) * 3 + 4,  # +4 for CSE400
+    "general_ed_credits": 36,
+    "elective_credits": 12
+}
+
 # Default credit values
 DEFAULT_CREDITS = {
     "CSE400": 4,  # Project/Thesis is 4 credits
     # Most other courses are 3 credits by default
 }
 
+@lru_cache(maxsize=None)
+def get_course_label(course_code):
+    """Get the selectbox label for a course code ("" is the placeholder option)"""
+    if not course_code:
+        return "Select a course"
+    return f"{course_code} - {COURSE_NAMES.get(course_code, 'Course')}"
+
+@lru_cache(maxsize=None)
 def get_course_credit(course_code):
     """Get credit value for a course"""
     return DEFAULT_CREDITS.get(course_code, 3)
@@ -213,129 +302,102 @@ def get_course_credit(course_code):
 def get_unlocked_courses(completed_courses):
     """Get list of courses that are now unlocked based on completed courses"""
     completed_set = set(completed_courses)
-    unlocked = set()
-    
-    # Build prerequisite map (what each course requires)
-    prereq_map = {}
-    for course, unlocks_list in COURSE_PREREQUISITES.items():
-        for unlocked_course in unlocks_list:
-            if unlocked_course not in prereq_map:
-                prereq_map[unlocked_course] = []
-            prereq_map[unlocked_course].append(course)
+    unlocked = []
     
-    # Check which courses are unlocked
-    for course in COURSE_PREREQUISITES.keys():
+    # Check which courses are unlocked; iterating in sorted order keeps the result sorted
+    for course in _ALL_COURSE_CODES_SORTED:
         if course in completed_set:
             continue  # Already completed
             
-        prereqs = prereq_map.get(course, [])
-        if all(prereq in completed_set for prereq in prereqs):
-            unlocked.add(course)
+        if course in _NO_PREREQ_COURSES or COURSE_REQUIREMENTS[course] <= completed_set:
+            unlocked.append(course)
     
-    return sorted(unlocked)
+    return unlocked
+
+def get_all_prerequisites(course_code):
+    """Get every course that must be completed, directly or transitively, before a course"""
+    return _PREREQ_CLOSURE.get(course_code, frozenset())
+
+def can_take_course(course_code, completed_courses):
+    """Check whether a course's full prerequisite chain is completed"""
+    return get_all_prerequisites(course_code).issubset(completed_courses)
 
 def get_all_courses():
     """Get all available courses"""
-    all_courses = set(COURSE_PREREQUISITES.keys())
-    
-    # Add courses from all categories
-    all_courses.update(CORE_CSE_COURSES)
-    all_courses.update(CSE_ELECTIVES)
-    all_courses.update(COMPULSORY_GENERAL_ED)
-    all_courses.update(SCIENCE_STREAM)
-    all_courses.update(ARTS_STREAM)
-    all_courses.update(SOCIAL_SCIENCE_STREAM)
-    all_courses.update(CST_STREAM)
-    
-    return sorted(all_courses)
+    return list(_ALL_COURSES_SORTED)
 
 def categorize_course(course_code, program="CSE"):
     """Categorize a course based on program"""
-    if program == "CSE":
-        core_courses = CORE_CSE_COURSES
-    else:
-        core_courses = CORE_CS_COURSES
-    
-    if course_code in core_courses:
-        return "Core"
-    elif course_code in COMPULSORY_GENERAL_ED:
-        return "Compulsory General Education"
-    elif course_code in CSE_ELECTIVES:
-        return "CSE Elective"
-    elif course_code in SCIENCE_STREAM:
-        return "Science Stream"
-    elif course_code in ARTS_STREAM:
-        return "Arts Stream"
-    elif course_code in SOCIAL_SCIENCE_STREAM:
-        return "Social Science Stream"
-    elif course_code in CST_STREAM:
-        return "CST Stream"
-    else:
-        return "Other"
+    return (_CATEGORY_FOR_CSE if program == "CSE" else _CATEGORY_FOR_CS).get(course_code, "Other")
 
 def get_program_requirements(program="CSE"):
     """Get credit requirements for a program"""
-    if program == "CSE":
-        return {
-            "total_credits": 136,
-            "core_credits": len(CORE_CSE_COURSES) * 3 + 4,  # +4 for CSE400
-            "general_ed_credits": 36,
-            "elective_credits": 18
-        }
-    else:  # CS
-        return {
-            "total_credits": 124,
-            "core_credits": len(CORE_CS_COURSES) * 3 + 4,  # +4 for CSE400
-            "general_ed_credits": 36,
-            "elective_credits": 12
-        }
+    # Copy so callers can't alter the shared constants
+    return dict(_CSE_REQUIREMENTS if program == "CSE" else _CS_REQUIREMENTS)
 
 def plan_general_education_courses(completed_courses, max_courses=5):
     """Plan general education courses based on completion status"""
-    completed_set = set(completed_courses)
-    
-    # Count courses in each stream
-    arts_completed = len([c for c in completed_courses if c in ARTS_STREAM])
-    social_science_completed = len([c for c in completed_courses if c in SOCIAL_SCIENCE_STREAM])  
-    cst_completed = len([c for c in completed_courses if c in CST_STREAM])
-    science_completed = len([c for c in completed_courses if c in SCIENCE_STREAM])
+    result = _plan_general_education_courses(frozenset(completed_courses), max_courses)
+    # The memoized result is shared, so hand out a copy
+    return dict(result, plan=list(result["plan"]))
+
+def _first_available(stream, completed_set):
+    """Get the first course in a stream not yet completed, or None"""
+    for course in stream:
+        if course not in completed_set:
+            return course
+    return None
+
+@lru_cache(maxsize=1024)
+def _plan_general_education_courses(completed_set, max_courses):
+    """Memoized planner keyed on the frozenset of completed courses"""
+    # Count courses in each stream (set intersection iterates the smaller side)
+    arts_completed = len(ARTS_STREAM & completed_set)
+    social_science_completed = len(SOCIAL_SCIENCE_STREAM & completed_set)
+    cst_completed = len(CST_STREAM & completed_set)
+    science_completed = len(SCIENCE_STREAM & completed_set)
     
     total_stream_courses = arts_completed + social_science_completed + cst_completed + science_completed
     remaining = max_courses - total_stream_courses
     
     plan = []
+    summary = {
+        "plan": plan,
+        "arts_completed": arts_completed,
+        "social_science_completed": social_science_completed,
+        "cst_completed": cst_completed,
+        "science_completed": science_completed,
+        "total_completed": total_stream_courses,
+    }
+    
+    if remaining <= 0:
+        summary["remaining_slots"] = remaining
+        return summary
     
     # Priority: Arts (required), Social Science (required), then others
     if arts_completed == 0 and remaining > 0:
-        available_arts = [c for c in ARTS_STREAM if c not in completed_set]
+        available_arts = _first_available(ARTS_STREAM, completed_set)
         if available_arts:
-            plan.append(("Arts", available_arts[0]))
+            plan.append(("Arts", available_arts))
             remaining -= 1
     
     if social_science_completed == 0 and remaining > 0:
-        available_ss = [c for c in SOCIAL_SCIENCE_STREAM if c not in completed_set]
+        available_ss = _first_available(SOCIAL_SCIENCE_STREAM, completed_set)
         if available_ss:
-            plan.append(("Social Science", available_ss[0]))
+            plan.append(("Social Science", available_ss))
             remaining -= 1
     
     if cst_completed == 0 and remaining > 0:
-        available_cst = [c for c in CST_STREAM if c not in completed_set]
+        available_cst = _first_available(CST_STREAM, completed_set)
         if available_cst:
-            plan.append(("CST", available_cst[0]))
+            plan.append(("CST", available_cst))
             remaining -= 1
     
     if science_completed == 0 and remaining > 0:
-        available_science = [c for c in SCIENCE_STREAM if c not in completed_set]
+        available_science = _first_available(SCIENCE_STREAM, completed_set)
         if available_science:
-            plan.append(("Science", available_science[0]))
+            plan.append(("Science", available_science))
             remaining -= 1
     
-    return {
-        "plan": plan,
-        "arts_completed": arts_completed,
-        "social_science_completed": social_science_completed,
-        "cst_completed": cst_completed,
-        "science_completed": science_completed,
-        "total_completed": total_stream_courses,
-        "remaining_slots": remaining
-    }
\ No newline at end of file
+    summary["remaining_slots"] = remaining
+    return summary
@@ -2,43 +2,89 @@
 Course and Semester Management Utilities
 """
 
+import sys
+
+import numpy as np
+from bisect import bisect_right, insort
+
+from course_data import GRADE_POINTS
+
 class Course:
     """Represents a single course with its academic details"""
     
-    def __init__(self, course_code, course_name="", credit=3, grade="", gpa=0.0):
-        self.course_code = course_code
+    __slots__ = ('course_code', 'course_name', '_credit', 'grade', '_gpa', 'quality_points')
+    
+    def __init__(self, course_code, course_name="", credit=3, grade="", gpa=None):
+        # Interned so codes parsed from a gradesheet share identity with the course_data keys
+        self.course_code = sys.intern(course_code)
         self.course_name = course_name
-        self.credit = credit
-        self.grade = grade
-        self.gpa = gpa
+        self._credit = credit
+        # Grades are canonicalized once here; a GPA left as None comes from the grade
+        self.grade = grade.strip().upper()
+        self._gpa = GRADE_POINTS.get(self.grade, 0.0) if gpa is None else gpa
+        self.quality_points = self._gpa * credit
         
     def __repr__(self):
         return f"Course({self.course_code}, {self.grade}, {self.gpa}, {self.credit})"
     
+    @property
+    def credit(self):
+        return self._credit
+    
+    @credit.setter
+    def credit(self, value):
+        self._credit = value
+        self.quality_points = self._gpa * value
+    
+    @property
+    def gpa(self):
+        return self._gpa
+    
+    @gpa.setter
+    def gpa(self, value):
+        self._gpa = value
+        self.quality_points = value * self._credit
+    
     def get_quality_points(self):
-        """Calculate quality points for this course"""
-        return self.gpa * self.credit
+        """Get quality points for this course (also readable as the quality_points attribute)"""
+        return self.quality_points
     
-    def update_grade(self, grade, gpa):
-        """Update course grade and GPA"""
-        self.grade = grade
-        self.gpa = gpa
+    def update_grade(self, grade, gpa=None):
+        """Update course grade and GPA (derived from the grade when gpa is None)"""
+        self.grade = grade.strip().upper()
+        self.gpa = GRADE_POINTS.get(self.grade, 0.0) if gpa is None else gpa
 
 
 class Semester:
     """Represents a semester with multiple courses"""
     
+    __slots__ = ('semester_name', 'courses', 'gpa', 'credit', 'cgpa', '_qp_sum', '_cred_sum')
+    
     def __init__(self, semester_name):
         self.semester_name = semester_name
         self.courses = []
         self.gpa = 0.0
         self.credit = 0
         self.cgpa = 0.0
+        self._qp_sum = 0
+        self._cred_sum = 0
         
     def add_course(self, course):
         """Add a course to this semester"""
         self.courses.append(course)
-        self._calculate_stats()
+        # Appending to the running sums adds in the same order sum() would
+        self._qp_sum += course.quality_points
+        self._cred_sum += course.credit
+        self._set_stats()
+    
+    def add_courses(self, courses):
+        """Add several courses to this semester, updating stats once"""
+        courses = list(courses)
+        self.courses.extend(courses)
+        for course in courses:
+            self._qp_sum += course.quality_points
+            self._cred_sum += course.credit
+        self._set_stats()
         
     def remove_course(self, course_code):
         """Remove a course from this semester"""
@@ -46,16 +92,20 @@ class Semester:
         self._calculate_stats()
         
     def _calculate_stats(self):
-        """Calculate semester GPA and total credits"""
+        """Recalculate semester sums from scratch, then GPA and total credits"""
+        self._qp_sum = sum(course.quality_points for course in self.courses)
+        self._cred_sum = sum(course.credit for course in self.courses)
+        self._set_stats()
+    
+    def _set_stats(self):
+        """Set semester GPA and total credits from the running sums"""
         if not self.courses:
             self.gpa = 0.0
             self.credit = 0
             return
-            
-        total_quality_points = sum(course.get_quality_points() for course in self.courses)
-        total_credits = sum(course.credit for course in self.courses)
         
-        self.gpa = round(total_quality_points / total_credits, 2) if total_credits > 0 else 0.0
+        total_credits = self._cred_sum
+        self.gpa = round(self._qp_sum / total_credits, 2) if total_credits > 0 else 0.0
         self.credit = total_credits
         
     def get_courses_list(self):
@@ -66,16 +116,45 @@ class Semester:
 class AcademicRecord:
     """Manages all academic records across semesters"""
     
+    __slots__ = (
+        'student_name', 'student_id', 'semesters', '_cgpa_semesters', '_semester_order',
+        'courses_taken', '_course_semester', 'version', '_fingerprint',
+        '_completed_courses', '_completed_course_set', '_course_index',
+        '_credit_array', '_gpa_array', '_total_credits', '_total_quality_points',
+        '_snapshot_version', '_cgpa_version',
+    )
+    
     def __init__(self, student_name="", student_id=""):
         self.student_name = student_name
         self.student_id = student_id
         self.semesters = {}
+        # Parallel ordered views of self.semesters, kept sorted as semesters are added
+        self._cgpa_semesters = []  # (name, Semester) in the order cumulative CGPA runs
+        self._semester_order = []  # (sort key, insertion index, name, Semester) in display order
         self.courses_taken = {}  # course_code -> Course object
+        self._course_semester = {}  # course_code -> name of the semester holding courses_taken[code]
+        self.version = 0  # bumped on every course mutation
+        self._fingerprint = None
+        self._completed_courses = ()
+        self._completed_course_set = frozenset()
+        self._course_index = {}
+        self._credit_array = np.zeros(0)
+        self._gpa_array = np.zeros(0)
+        self._total_credits = 0
+        self._total_quality_points = 0.0
+        self._snapshot_version = -1
+        self._cgpa_version = -1
         
     def add_semester(self, semester_name):
         """Add a new semester"""
         if semester_name not in self.semesters:
-            self.semesters[semester_name] = Semester(semester_name)
+            semester = Semester(semester_name)
+            # Names and insertion indexes are unique, so Semester objects are never compared;
+            # the insertion index keeps equal sort keys in the order they were added
+            insort(self._semester_order,
+                   (_semester_sort_key(semester_name), len(self.semesters), semester_name, semester))
+            insort(self._cgpa_semesters, (semester_name, semester))
+            self.semesters[semester_name] = semester
     
     def add_course_to_semester(self, semester_name, course):
         """Add a course to a specific semester"""
@@ -84,37 +163,49 @@ class AcademicRecord:
             
         self.semesters[semester_name].add_course(course)
         self.courses_taken[course.course_code] = course
-        self._update_cgpa()
+        self._course_semester[course.course_code] = semester_name
+        self.version += 1
+    
+    def add_courses_to_semester(self, semester_name, courses):
+        """Add several courses to a specific semester in one batch"""
+        courses = list(courses)
+        if semester_name not in self.semesters:
+            self.add_semester(semester_name)
+        
+        self.semesters[semester_name].add_courses(courses)
+        for course in courses:
+            self.courses_taken[course.course_code] = course
+            self._course_semester[course.course_code] = semester_name
+        self.version += 1
     
     def remove_course(self, course_code):
         """Remove a course from all records"""
         # Remove from courses_taken
         if course_code in self.courses_taken:
             del self.courses_taken[course_code]
+        self._course_semester.pop(course_code, None)
         
         # Remove from all semesters
         for semester in self.semesters.values():
             semester.remove_course(course_code)
         
-        self._update_cgpa()
+        self.version += 1
     
-    def update_course_grade(self, course_code, grade, gpa):
+    def update_course_grade(self, course_code, grade, gpa=None):
         """Update grade for an existing course"""
         if course_code in self.courses_taken:
+            # The semester holds this same Course object, so one update covers both
             self.courses_taken[course_code].update_grade(grade, gpa)
+            self.semesters[self._course_semester[course_code]]._calculate_stats()
             
-            # Update in semester as well
-            for semester in self.semesters.values():
-                for course in semester.courses:
-                    if course.course_code == course_code:
-                        course.update_grade(grade, gpa)
-                        break
-                semester._calculate_stats()
-            
-            self._update_cgpa()
+            self.version += 1
     
     def _update_cgpa(self):
-        """Update CGPA for all semesters"""
+        """Update CGPA for all semesters, once per version and only when semester data is read"""
+        if self._cgpa_version == self.version:
+            return
+        self._cgpa_version = self.version
+        
         if not self.courses_taken:
             return
             
@@ -122,86 +213,131 @@ class AcademicRecord:
         total_credits = 0
         
         # Calculate cumulative stats for each semester
-        semester_names = sorted(self.semesters.keys())
-        
-        for semester_name in semester_names:
-            semester = self.semesters[semester_name]
-            
+        for _, semester in self._cgpa_semesters:
             # Add current semester's contribution
             for course in semester.courses:
-                total_quality_points += course.get_quality_points()
+                total_quality_points += course.quality_points
                 total_credits += course.credit
             
             # Update CGPA for this semester
             semester.cgpa = round(total_quality_points / total_credits, 2) if total_credits > 0 else 0.0
     
+    def _refresh_snapshot(self):
+        """Rebuild the cached fingerprint and completed-course views after a mutation"""
+        if self._snapshot_version == self.version:
+            return
+        courses = tuple(sorted(
+            (code, course.grade, course.gpa, course.credit)
+            for code, course in self.courses_taken.items()
+        ))
+        placement = tuple(sorted(
+            (semester_name, course.course_code)
+            for semester_name, semester in self.semesters.items()
+            for course in semester.courses
+        ))
+        self._fingerprint = hash((courses, placement))
+        self._completed_courses = tuple(self.courses_taken)
+        self._completed_course_set = frozenset(self._completed_courses)
+        self._course_index = {code: i for i, code in enumerate(self._completed_courses)}
+        
+        # Parallel read-only arrays in get_completed_courses() order
+        courses_list = self.courses_taken.values()
+        self._credit_array = np.fromiter((c.credit for c in courses_list), dtype=float, count=len(courses_list))
+        self._gpa_array = np.fromiter((c.gpa for c in courses_list), dtype=float, count=len(courses_list))
+        self._credit_array.setflags(write=False)
+        self._gpa_array.setflags(write=False)
+        
+        # Summed in Python, in insertion order, so integer credits stay integers and
+        # CGPAs that land on a rounding boundary round exactly as before
+        self._total_credits = sum(c.credit for c in courses_list)
+        self._total_quality_points = sum(c.quality_points for c in courses_list)
+        self._snapshot_version = self.version
+    
+    def get_fingerprint(self):
+        """Get an integer hash of all courses and their semesters, rebuilt only after mutations"""
+        self._refresh_snapshot()
+        return self._fingerprint
+    
+    def get_completed_courses(self):
+        """Get the codes of all courses taken, in insertion order"""
+        self._refresh_snapshot()
+        return self._completed_courses
+    
+    def get_completed_course_set(self):
+        """Get the codes of all courses taken as a frozenset"""
+        self._refresh_snapshot()
+        return self._completed_course_set
+    
+    def get_course_index(self):
+        """Get a mapping of course code to its position in the course arrays"""
+        self._refresh_snapshot()
+        return self._course_index
+    
+    def get_credit_array(self):
+        """Get a read-only array of course credits, aligned with get_completed_courses()"""
+        self._refresh_snapshot()
+        return self._credit_array
+    
+    def get_gpa_array(self):
+        """Get a read-only array of course GPAs, aligned with get_completed_courses()"""
+        self._refresh_snapshot()
+        return self._gpa_array
+    
     def get_current_cgpa(self):
         """Get current overall CGPA"""
         if not self.courses_taken:
             return 0.0
             
-        total_quality_points = sum(course.get_quality_points() for course in self.courses_taken.values())
-        total_credits = sum(course.credit for course in self.courses_taken.values())
+        total_credits = self.get_total_credits()
         
-        return round(total_quality_points / total_credits, 2) if total_credits > 0 else 0.0
+        return round(self.get_total_quality_points() / total_credits, 2) if total_credits > 0 else 0.0
     
     def get_total_credits(self):
         """Get total credits earned"""
-        return sum(course.credit for course in self.courses_taken.values())
+        self._refresh_snapshot()
+        return self._total_credits
+    
+    def get_total_quality_points(self):
+        """Get total quality points earned"""
+        self._refresh_snapshot()
+        return self._total_quality_points
     
     def get_semester_data(self):
         """Get semester data sorted by semester order"""
-        semester_order = {
-            'SPRING': 1, 'SUMMER': 2, 'FALL': 3, 'VIRTUAL': 99
-        }
-        
-        def sort_key(sem_name):
-            if sem_name == "VIRTUAL SEMESTER":
-                return (9999, 99)
-            try:
-                parts = sem_name.split()
-                season = parts[0].upper()
-                year = int(parts[1]) if len(parts) > 1 else 0
-                return (year, semester_order.get(season, 99))
-            except:
-                return (9999, 99)
-        
-        sorted_semesters = sorted(self.semesters.keys(), key=sort_key)
-        return [(name, self.semesters[name]) for name in sorted_semesters]
+        self._update_cgpa()
+        return [(name, semester) for _, _, name, semester in self._semester_order]
+
+
+_SEMESTER_ORDER = {
+    'SPRING': 1, 'SUMMER': 2, 'FALL': 3, 'VIRTUAL': 99
+}
+
+
+def _semester_sort_key(sem_name):
+    """Sort key for a semester name such as "Fall 2021": (year, season order)"""
+    if sem_name == "VIRTUAL SEMESTER":
+        return (9999, 99)
+    parts = sem_name.split()
+    if not parts:
+        return (9999, 99)
+    season = _SEMESTER_ORDER.get(parts[0].upper(), 99)
+    if len(parts) == 1:
+        return (0, season)
+    if not parts[1].isdecimal():
+        return (9999, 99)
+    return (int(parts[1]), season)
+
+
+# Lowest GPA for each letter grade; a GPA below the first threshold is an F
+_LETTER_GRADE_THRESHOLDS = (1.0, 1.3, 1.7, 2.0, 2.3, 2.7, 3.0, 3.3, 3.7, 4.0)
+_LETTER_GRADES = ('F', 'D', 'D+', 'C-', 'C', 'C+', 'B-', 'B', 'B+', 'A-', 'A+')
 
 
 def calculate_grade_points(grade):
     """Convert letter grade to GPA points"""
-    grade_points = {
-        'A+': 4.0, 'A': 4.0, 'A-': 3.7,
-        'B+': 3.3, 'B': 3.0, 'B-': 2.7,
-        'C+': 2.3, 'C': 2.0, 'C-': 1.7,
-        'D+': 1.3, 'D': 1.0, 'F': 0.0
-    }
-    return grade_points.get(grade.upper(), 0.0)
+    return GRADE_POINTS.get(grade.upper(), 0.0)
 
 
 def get_letter_grade(gpa):
     """Convert GPA to letter grade"""
-    if gpa >= 4.0:
-        return 'A+'
-    elif gpa >= 3.7:
-        return 'A-'
-    elif gpa >= 3.3:
-        return 'B+'
-    elif gpa >= 3.0:
-        return 'B'
-    elif gpa >= 2.7:
-        return 'B-'
-    elif gpa >= 2.3:
-        return 'C+'
-    elif gpa >= 2.0:
-        return 'C'
-    elif gpa >= 1.7:
-        return 'C-'
-    elif gpa >= 1.3:
-        return 'D+'
-    elif gpa >= 1.0:
-        return 'D'
-    else:
-        return 'F'
\ No newline at end of file
+    return _LETTER_GRADES[bisect_right(_LETTER_GRADE_THRESHOLDS, gpa)]
\ No newline at end of file
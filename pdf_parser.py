@@ -4,37 +4,96 @@ Extracts academic data from university transcripts/gradesheets
 """
 
 import fitz  # PyMuPDF
+import heapq
+import os
 import re
-from typing import Dict, List, Tuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import accumulate
+from typing import Dict, List, NamedTuple, Tuple, Optional
 from course_utils import AcademicRecord, Course, Semester
 from course_data import GRADE_POINTS, GRADES
 
+# Patterns used inside extract_course_details, compiled once; none of them matches
+# across a line break ([^\S\n] is whitespace other than a newline)
+_GPA_RE = re.compile(r'\b(\d\.\d{1,2})\b')
+_CREDIT_RE = re.compile(r'\b([1-6])[^\S\n]*(?:credit|credits|cr)?\b', re.IGNORECASE)
+
+# Grades whose courses are skipped
+_SKIP_GRADES = frozenset({'F', 'W', 'I'})
+
+# Any grade in GRADES as a whole token; longest first so A+ is not read as A
+_GRADE_RE = re.compile(
+    r'\b(' + '|'.join(re.escape(g) for g in sorted(GRADES, key=len, reverse=True)) + r')(?![\w+-])'
+)
+
+# Most course-detail windows kept per parser before the cache is reset
+_DETAILS_CACHE_SIZE = 4096
+
+
+class _ParsedCourse(NamedTuple):
+    """A course read from a gradesheet, before it becomes a Course"""
+    course_code: str
+    grade: str
+    gpa: float
+    credits: int
+
+
+def _extract_text(pdf_path: str, sort_blocks: bool = True) -> str:
+    """Read the text of every page of a PDF"""
+    with fitz.open(pdf_path) as doc:
+        if not sort_blocks:
+            # The page's own stream order, in one call per page
+            return "\n".join(page.get_text("text") for page in doc)
+        
+        parts = []
+        for page in doc:
+            # Get text blocks sorted by position (y, then x), skipping the sort when
+            # the page already lists them in that order
+            blocks = page.get_text("blocks")
+            if any((a[1], a[0]) > (b[1], b[0]) for a, b in zip(blocks, blocks[1:])):
+                blocks.sort(key=lambda b: (b[1], b[0]))
+            for block in blocks:
+                parts.append(block[4])
+                parts.append("\n")
+        return "".join(parts)
+
+
+@lru_cache(maxsize=8)
+def _extract_text_cached(pdf_path: str, mtime_ns: int, size: int, sort_blocks: bool) -> str:
+    """_extract_text memoized on the file's path, modification time and size"""
+    return _extract_text(pdf_path, sort_blocks)
+
+
 class GradesheetParser:
     """Parser for university gradesheet PDFs"""
     
     def __init__(self):
-        # Common patterns for university gradesheets
-        self.semester_patterns = [
-            r'SEMESTER:\s*(.+)',
-            r'Term:\s*(.+)',
-            r'(SPRING|SUMMER|FALL)\s+(\d{4})',
-            r'Semester\s*:\s*(.+)'
-        ]
+        # Common patterns for university gradesheets, compiled once per parser.
+        # Each family is one alternation matched at line starts over the joined lines
+        # ([^\S\n] keeps whitespace within a line); the ^.*? prefix makes an earlier
+        # alternative win wherever it matches in the line, as if tried in turn.
+        # The semester lookahead rejects lines without any keyword in a single scan
+        # before the alternatives are tried.
+        self._semester_re = re.compile(
+            r'^(?=.*?(?:SEMESTER|TERM|SPRING|SUMMER|FALL))(?:'
+            r'.*?SEMESTER:[^\S\n]*(?P<s1>.+)'
+            r'|.*?Term:[^\S\n]*(?P<s2>.+)'
+            r'|.*?(?P<season>SPRING|SUMMER|FALL)[^\S\n]+(?P<year>\d{4})'  # SPRING 2024 format
+            r'|.*?Semester[^\S\n]*:[^\S\n]*(?P<s3>.+))',
+            re.IGNORECASE | re.MULTILINE
+        )
         
-        self.course_patterns = [
-            r'([A-Z]{3}\d{3})\s+',  # Course code pattern like CSE110
-            r'([A-Z]{2,4}\d{3})\s+',  # Flexible course pattern
-            r'([A-Z]+\d+)\s+'  # General pattern
-        ]
-        
-        self.grade_patterns = [
-            r'\b([A-F][+-]?|[WIXS])\b',  # Standard grades
-            r'\b(A\+|A|A-|B\+|B|B-|C\+|C|C-|D\+|D|F)\b'
-        ]
+        self._course_re = re.compile(
+            r'^.*?(?P<c1>[A-Z]{3}\d{3})[^\S\n]'  # Course code pattern like CSE110
+            r'|^.*?(?P<c2>[A-Z]{2,4}\d{3})[^\S\n]'  # Flexible course pattern
+            r'|^.*?(?P<c3>[A-Z]+\d+)[^\S\n]',  # General pattern
+            re.MULTILINE
+        )
         
         self.gpa_patterns = [
-            r'(\d\.\d{1,2})',  # GPA pattern
-            r'(\d\.\d+)'
+            re.compile(r'(\d\.\d{1,2})'),  # GPA pattern
+            re.compile(r'(\d\.\d+)')
         ]
         
         # Text to remove/ignore
@@ -43,24 +102,28 @@ class GradesheetParser:
             'Page', 'of', 'Kha', 'Bir Uttam', 'Rafiqul Islam', 'Avenue', 'Merul Badda',
             'Dhaka', 'Credits Earned', 'Quality Points', 'GPA', 'CGPA', 'SEMESTER'
         }
+        # All ignore_text substrings as one pattern, so each line is scanned once
+        self._ignore_re = re.compile('|'.join(re.escape(text) for text in sorted(self.ignore_text)))
+        
+        # (course_code, window of lines) -> extract_course_details result
+        self._details_cache: Dict[Tuple[str, Tuple[str, ...]], Optional[_ParsedCourse]] = {}
     
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
-        """Extract all text from PDF"""
+    def extract_text_from_pdf(self, pdf_path: str, sort_blocks: bool = True) -> str:
+        """Extract all text from PDF, reusing the text while the file is unchanged
+        
+        Text blocks are sorted by position; sort_blocks=False keeps the page's
+        stream order instead, which is faster but can misorder table cells
+        """
         try:
-            doc = fitz.open(pdf_path)
-            full_text = ""
-            
-            for page in doc:
-                # Get text blocks sorted by position
-                blocks = page.get_text("blocks")
-                blocks = sorted(blocks, key=lambda b: (b[1], b[0]))  # Sort by y, then x
-                
-                for block in blocks:
-                    full_text += block[4] + "\n"
-            
-            doc.close()
-            return full_text
+            stat = os.stat(pdf_path)
+            key = (pdf_path, stat.st_mtime_ns, stat.st_size)
+        except (OSError, TypeError, ValueError):
+            key = None  # Let PyMuPDF report the problem below
         
+        try:
+            if key:
+                return _extract_text_cached(*key, sort_blocks)
+            return _extract_text(pdf_path, sort_blocks)
         except Exception as e:
             raise Exception(f"Error reading PDF: {str(e)}")
     
@@ -68,10 +131,11 @@ class GradesheetParser:
         """Clean and split text into lines"""
         lines = text.split('\n')
         cleaned_lines = []
+        ignore_search = self._ignore_re.search
         
         for line in lines:
             line = line.strip()
-            if line and not any(ignore in line for ignore in self.ignore_text):
+            if line and not ignore_search(line):
                 cleaned_lines.append(line)
         
         return cleaned_lines
@@ -80,156 +144,204 @@ class GradesheetParser:
         """Extract student name and ID"""
         name = None
         student_id = None
+        labelled_id = False  # student_id came from an explicit "Student ID" label
         
-        for i, line in enumerate(lines):
-            if 'Name' in line and i + 1 < len(lines):
-                name = lines[i + 1].strip()
-            elif 'Student ID' in line and i + 1 < len(lines):
+        # The value follows its label, so the last line can't be a label
+        for i in range(len(lines) - 1):
+            line = lines[i]
+            if 'Name' in line:
+                # The first Name label is the student's; later ones are table headers
+                if name is None:
+                    name = lines[i + 1].strip()
+            elif 'Student ID' in line:
                 student_id = lines[i + 1].strip()
-            elif 'ID' in line and not student_id and i + 1 < len(lines):
+                labelled_id = True
+            elif 'ID' in line and not student_id:
                 potential_id = lines[i + 1].strip()
                 if potential_id.isdigit() and len(potential_id) >= 8:
                     student_id = potential_id
+            
+            # Stop once both are known; a labelled ID beats one guessed from an ID line
+            if name is not None and labelled_id:
+                break
         
         return name, student_id
     
     def extract_semesters_and_courses(self, lines: List[str]) -> Dict:
         """Extract semester and course information"""
+        return self._scan_text("\n".join(lines), lines)
+    
+    def _scan_text(self, text: str, lines: List[str]) -> Dict:
+        """Find semester headers and course codes with one sweep each over the joined lines"""
         academic_data = {
             'semesters': {},
             'courses': {}
         }
         
-        current_semester = None
-        i = 0
+        # Both patterns are anchored to line starts, so a match's offset identifies its line
+        line_index = dict(zip(accumulate((len(line) + 1 for line in lines), initial=0), range(len(lines))))
         
-        while i < len(lines):
-            line = lines[i]
-            
-            # Check for semester indicators
-            semester_match = None
-            for pattern in self.semester_patterns:
-                match = re.search(pattern, line, re.IGNORECASE)
-                if match:
-                    if len(match.groups()) == 2:  # SPRING 2024 format
-                        semester_match = f"{match.group(1)} {match.group(2)}"
-                    else:
-                        semester_match = match.group(1).strip()
-                    break
-            
+        semester_lines = {}
+        for match in self._semester_re.finditer(text):
+            if match.lastgroup == 'year':  # SPRING 2024 format
+                semester_match = f"{match.group('season')} {match.group('year')}"
+            else:
+                semester_match = match.group(match.lastgroup).strip()
             if semester_match:
-                current_semester = semester_match.upper()
-                if current_semester not in academic_data['semesters']:
-                    academic_data['semesters'][current_semester] = []
-                i += 1
+                semester_lines[match.start()] = semester_match.upper()
+        
+        # A line holding a semester header is not checked for course codes
+        course_lines = {
+            match.start(): match.group(match.lastgroup)
+            for match in self._course_re.finditer(text)
+            if match.start() not in semester_lines
+        }
+        
+        # Locals for the walk over the matches
+        semesters = academic_data['semesters']
+        courses = academic_data['courses']
+        extract_course_details = self.extract_course_details
+        
+        # finditer yields offsets in increasing order, so the two streams only need merging
+        current_semester = None
+        for start in heapq.merge(semester_lines, course_lines):
+            if start in semester_lines:
+                current_semester = semester_lines[start]
+                if current_semester not in semesters:
+                    semesters[current_semester] = []
                 continue
             
-            # Look for course codes
-            course_match = None
-            for pattern in self.course_patterns:
-                match = re.search(pattern, line)
-                if match:
-                    course_match = match.group(1)
-                    break
-            
-            if course_match and current_semester:
-                course_info = self.extract_course_details(lines, i, course_match)
+            course_match = course_lines[start]
+            if current_semester:
+                course_info = extract_course_details(lines, line_index[start], course_match)
                 if course_info:
-                    academic_data['semesters'][current_semester].append(course_info)
-                    academic_data['courses'][course_match] = course_info
-            
-            i += 1
+                    semesters[current_semester].append(course_info)
+                    courses[course_match] = course_info
         
         return academic_data
     
-    def extract_course_details(self, lines: List[str], start_idx: int, course_code: str) -> Optional[Dict]:
+    def extract_course_details(self, lines: List[str], start_idx: int, course_code: str) -> Optional[_ParsedCourse]:
         """Extract details for a specific course"""
         # Look in current line and next few lines for grade and GPA
-        search_lines = lines[start_idx:min(start_idx + 5, len(lines))]
+        search_lines = tuple(lines[start_idx:min(start_idx + 5, len(lines))])
+        
+        # Retakes and repeated headers reuse the result for an identical window
+        key = (course_code, search_lines)
+        details_cache = self._details_cache
+        if key in details_cache:
+            details = details_cache[key]
+        else:
+            if len(details_cache) >= _DETAILS_CACHE_SIZE:
+                details_cache.clear()
+            details = details_cache[key] = self._find_course_details(search_lines, course_code)
+        
+        # Parsed courses are immutable, so callers can share the cached one
+        return details
+    
+    def _find_course_details(self, search_lines: Tuple[str, ...], course_code: str,
+                             _grade_points=GRADE_POINTS.get) -> Optional[_ParsedCourse]:
+        """Find the grade, GPA and credits of a course in its window of lines
+        
+        _grade_points is bound once at definition time so the lookup is a local.
+        """
+        # Scan the window once per field; no match spans a line break, so each scan
+        # sees the same matches the old per-line scans did
+        window = '\n'.join(search_lines)
+        
+        # Skip courses with no transfer before scanning anything
+        if '(NT)' in window:
+            return None
         
         grade = None
         gpa = None
         credits = 3  # Default
         
-        for line in search_lines:
-            # Look for grades
-            if not grade:
-                for grade_pattern in self.grade_patterns:
-                    grade_match = re.search(grade_pattern, line)
-                    if grade_match:
-                        potential_grade = grade_match.group(1)
-                        if potential_grade in GRADES:
-                            grade = potential_grade
-                            break
-            
-            # Look for GPA
-            if not gpa:
-                gpa_matches = re.findall(r'\b(\d\.\d{1,2})\b', line)
-                for match in gpa_matches:
-                    gpa_val = float(match)
-                    if 0.0 <= gpa_val <= 4.0:
-                        gpa = gpa_val
-                        break
-            
-            # Look for credits
-            credit_match = re.search(r'\b([1-6])\s*(?:credit|credits|cr)?\b', line, re.IGNORECASE)
-            if credit_match:
-                credits = int(credit_match.group(1))
+        # Look for the grade: the first one in the window
+        grade_match = _GRADE_RE.search(window)
+        if grade_match:
+            grade = grade_match.group(1)
+            # Skip courses with failing grades
+            if grade in _SKIP_GRADES:
+                return None
+        
+        # Look for GPA: the first in-range value on a line counts, and a 0.0 leaves
+        # later lines to override it
+        search_gpa = _GPA_RE.search
+        match = search_gpa(window)
+        while match:
+            gpa_val = float(match.group(1))
+            if not 0.0 <= gpa_val <= 4.0:
+                match = search_gpa(window, match.end())
+                continue
+            gpa = gpa_val
+            next_line = window.find('\n', match.end())
+            if gpa or next_line < 0:
+                break
+            match = search_gpa(window, next_line + 1)
+        
+        # Look for credits: the first match on the last line that has one
+        credit_matches = list(_CREDIT_RE.finditer(window))
+        if credit_matches:
+            line_start = window.rfind('\n', 0, credit_matches[-1].start()) + 1
+            credits = int(_CREDIT_RE.search(window, line_start).group(1))
         
         # If we found grade but not GPA, calculate GPA from grade
         if grade and gpa is None:
-            gpa = GRADE_POINTS.get(grade, 0.0)
-        
-        # Skip courses with failing grades or no transfer
-        if grade in ['F', 'W', 'I'] or '(NT)' in ' '.join(search_lines):
-            return None
+            gpa = _grade_points(grade, 0.0)
         
         if grade and gpa is not None:
-            return {
-                'course_code': course_code,
-                'grade': grade,
-                'gpa': gpa,
-                'credits': credits
-            }
+            return _ParsedCourse(course_code, grade, gpa, credits)
         
         return None
     
-    def parse_gradesheet(self, pdf_path: str) -> AcademicRecord:
-        """Main method to parse gradesheet and return AcademicRecord"""
+    def parse_gradesheet(self, pdf_path: str, text: Optional[str] = None) -> AcademicRecord:
+        """Main method to parse gradesheet and return AcademicRecord
+        
+        text, if given, is extract_text_from_pdf(pdf_path) already read by the caller
+        """
         try:
             # Extract text from PDF
-            full_text = self.extract_text_from_pdf(pdf_path)
-            
-            # Clean and process text
-            lines = self.clean_text(full_text)
-            
-            # Extract student information
-            name, student_id = self.extract_student_info(lines)
-            
-            # Create academic record
-            academic_record = AcademicRecord(name or "", student_id or "")
+            full_text = self.extract_text_from_pdf(pdf_path) if text is None else text
+            academic_record = self._parse_text(full_text)
             
-            # Extract academic data
-            academic_data = self.extract_semesters_and_courses(lines)
-            
-            # Populate academic record
-            for semester_name, courses in academic_data['semesters'].items():
-                if courses:  # Only add semesters with courses
-                    for course_info in courses:
-                        course = Course(
-                            course_code=course_info['course_code'],
-                            course_name=course_info['course_code'],  # Will be updated from course_data
-                            credit=course_info['credits'],
-                            grade=course_info['grade'],
-                            gpa=course_info['gpa']
-                        )
-                        academic_record.add_course_to_semester(semester_name, course)
+            if not academic_record.courses_taken:
+                # Nothing found with blocks sorted by position; retry in stream order
+                academic_record = self._parse_text(self.extract_text_from_pdf(pdf_path, sort_blocks=False))
             
             return academic_record
         
         except Exception as e:
             raise Exception(f"Error parsing gradesheet: {str(e)}")
     
+    def _parse_text(self, full_text: str) -> AcademicRecord:
+        """Build an AcademicRecord from extracted gradesheet text"""
+        # Clean and process text
+        lines = self.clean_text(full_text)
+        
+        # Extract student information
+        name, student_id = self.extract_student_info(lines)
+        
+        # Create academic record
+        academic_record = AcademicRecord(name or "", student_id or "")
+        
+        # Extract academic data
+        academic_data = self.extract_semesters_and_courses(lines)
+        
+        # Populate academic record
+        for semester_name, courses in academic_data['semesters'].items():
+            if courses:  # Only add semesters with courses
+                for course_info in courses:
+                    course = Course(
+                        course_code=course_info.course_code,
+                        course_name=course_info.course_code,  # Will be updated from course_data
+                        credit=course_info.credits,
+                        grade=course_info.grade,
+                        gpa=course_info.gpa
+                    )
+                    academic_record.add_course_to_semester(semester_name, course)
+        
+        return academic_record
+    
     def validate_parsed_data(self, academic_record: AcademicRecord) -> Dict:
         """Validate the parsed data and return statistics"""
         stats = {
@@ -264,46 +376,49 @@ class SmartGradesheetParser(GradesheetParser):
     def __init__(self):
         super().__init__()
         
-        # Enhanced patterns for different university formats
-        self.enhanced_course_patterns = [
-            r'([A-Z]{3}\d{3})\s+([A-F][+-]?|\w+)\s+(\d\.\d{2})',  # Course + Grade + GPA
-            r'([A-Z]{2,4}\d{3})\s+.*?([A-F][+-]?)\s+(\d\.\d{2})',  # Flexible with grade and GPA
-            r'([A-Z]+\d+)(?:\s+.*?)?\s+([A-F][+-]?|[WIXS])\s+(\d\.\d{1,2})'  # General pattern
-        ]
+        # Enhanced patterns for different university formats, as one alternation so the
+        # text is scanned once. Grade groups only accept valid grades, so a match with an
+        # unusable grade cannot consume text a later alternative would have parsed.
+        grades = '|'.join(re.escape(g) for g in sorted(GRADES, key=len, reverse=True))
+        letter_grades = '|'.join(re.escape(g) for g in sorted(GRADES, key=len, reverse=True)
+                                 if re.fullmatch(r'[A-F][+-]?', g))
+        self._enhanced_re = re.compile(
+            rf'(?P<c1>[A-Z]{{3}}\d{{3}})\s+(?P<g1>{grades})\s+(?P<p1>\d\.\d{{2}})'  # Course + Grade + GPA
+            rf'|(?P<c2>[A-Z]{{2,4}}\d{{3}})\s+.*?(?P<g2>{letter_grades})\s+(?P<p2>\d\.\d{{2}})'  # Flexible with grade and GPA
+            rf'|(?P<c3>[A-Z]+\d+)(?:\s+.*?)?\s+(?P<g3>{grades})\s+(?P<p3>\d\.\d{{1,2}})'  # General pattern
+        )
     
-    def smart_course_extraction(self, text: str) -> List[Dict]:
+    def smart_course_extraction(self, text: str) -> List[_ParsedCourse]:
         """Use enhanced patterns for better course extraction"""
         courses = []
+        seen = set()
         
-        for pattern in self.enhanced_course_patterns:
-            matches = re.finditer(pattern, text, re.MULTILINE)
-            for match in matches:
-                try:
-                    course_code = match.group(1)
-                    grade = match.group(2) if len(match.groups()) > 1 else 'A'
-                    gpa = float(match.group(3)) if len(match.groups()) > 2 else 4.0
-                    
-                    if grade in GRADES and 0.0 <= gpa <= 4.0:
-                        courses.append({
-                            'course_code': course_code,
-                            'grade': grade,
-                            'gpa': gpa,
-                            'credits': 4 if course_code.endswith('400') else 3
-                        })
-                except (ValueError, IndexError):
-                    continue
+        for match in self._enhanced_re.finditer(text):
+            # The GPA group closes each alternative, so it names the one that matched
+            n = match.lastgroup[1]
+            course_code = match.group('c' + n)
+            grade = match.group('g' + n)
+            gpa = float(match.group('p' + n))
+            
+            if course_code not in seen and 0.0 <= gpa <= 4.0:
+                seen.add(course_code)
+                courses.append(_ParsedCourse(course_code, grade, gpa,
+                                             4 if course_code.endswith('400') else 3))
         
         return courses
     
     def parse_gradesheet_smart(self, pdf_path: str) -> AcademicRecord:
         """Smart parsing with fallback methods"""
+        full_text = None
         try:
-            # First try the regular parsing
-            return self.parse_gradesheet(pdf_path)
+            # First try the regular parsing on text read once for both methods
+            full_text = self.extract_text_from_pdf(pdf_path)
+            return self.parse_gradesheet(pdf_path, text=full_text)
         except Exception as e:
-            # Fallback to smart extraction
+            # Fallback to smart extraction, reading the PDF again only if the first read failed
             try:
-                full_text = self.extract_text_from_pdf(pdf_path)
+                if full_text is None:
+                    full_text = self.extract_text_from_pdf(pdf_path)
                 lines = self.clean_text(full_text)
                 
                 name, student_id = self.extract_student_info(lines)
@@ -314,11 +429,11 @@ class SmartGradesheetParser(GradesheetParser):
                 
                 for course_info in courses:
                     course = Course(
-                        course_code=course_info['course_code'],
-                        course_name=course_info['course_code'],
-                        credit=course_info['credits'],
-                        grade=course_info['grade'],
-                        gpa=course_info['gpa']
+                        course_code=course_info.course_code,
+                        course_name=course_info.course_code,
+                        credit=course_info.credits,
+                        grade=course_info.grade,
+                        gpa=course_info.gpa
                     )
                     academic_record.add_course_to_semester("PARSED SEMESTER", course)
                 
@@ -329,4 +444,18 @@ class SmartGradesheetParser(GradesheetParser):
 
 def create_parser() -> SmartGradesheetParser:
     """Factory function to create a parser instance"""
-    return SmartGradesheetParser()
\ No newline at end of file
+    return SmartGradesheetParser()
+
+def _parse_one(pdf_path: str) -> AcademicRecord:
+    """Parse one gradesheet with a fresh parser (top level so worker processes can pickle it)"""
+    return create_parser().parse_gradesheet_smart(pdf_path)
+
+
+def parse_many(pdf_paths: List[str], max_workers: Optional[int] = None) -> List[AcademicRecord]:
+    """Parse several gradesheets in parallel, one worker process per CPU by default"""
+    pdf_paths = list(pdf_paths)
+    if len(pdf_paths) <= 1:
+        return [_parse_one(pdf_path) for pdf_path in pdf_paths]
+    
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        return list(executor.map(_parse_one, pdf_paths))
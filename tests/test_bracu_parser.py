@@ -0,0 +1,87 @@
+"""
+Regression tests for BRACUParser text extraction
+
+Expected results are what the original block-sorted extractor parsed from the same PDFs.
+"""
+
+import os
+import sys
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bracu_parser import BRACUParser  # noqa: E402
+
+# Rows of cells, each cell drawn at its own column like a real gradesheet table
+TABLE_ROWS = [
+    ["Name", ":", "John Doe"],
+    ["Student ID", ":", "20101234"],
+    ["SEMESTER:", "Spring 2021"],
+    ["CSE110", "Programming Language I", "3.00", "A", "4.00"],
+    ["MAT110", "Math I", "3.00", "B+", "3.30"],
+    ["ENG101", "English Fundamentals", "3.00", "F", "0.00"],
+    ["CSE111", "PL II (RP)", "3.00", "A-", "3.70"],
+    ["3.67", "CGPA", "3.67"],
+    ["SEMESTER:", "Fall 2021"],
+    ["CSE220", "Data Structures", "3.00", "B", "3.00"],
+    ["CSE221", "Algorithms", "3.00", "C+", "2.30"],
+    ["3.10", "CGPA", "3.40"],
+]
+TABLE_COLUMNS = [50, 130, 330, 400, 460]
+
+
+def _write_pdf(path, rows):
+    """Draw each row of cells on one baseline and save the PDF"""
+    doc = fitz.open()
+    page = doc.new_page()
+    y = 40
+    for row in rows:
+        if y > 800:
+            page = doc.new_page()
+            y = 40
+        for x, cell in zip(TABLE_COLUMNS, row):
+            page.insert_text((x, y), cell)
+        y += 18
+    doc.save(str(path))
+    doc.close()
+
+
+def _parse(pdf_path):
+    """Parse a PDF and reduce the result to plain values"""
+    name, student_id, courses, semesters = BRACUParser().extract_gradesheet(str(pdf_path))
+    return (
+        name,
+        student_id,
+        sorted((code, c.grade, c.gpa, c.credit) for code, c in courses.items()),
+        {sem: s.get_courses_list() for sem, s in semesters.items()},
+    )
+
+
+def test_table_layout_keeps_one_cell_per_line(tmp_path):
+    pdf_path = tmp_path / "table.pdf"
+    _write_pdf(pdf_path, TABLE_ROWS)
+
+    assert _parse(pdf_path) == (
+        "John Doe",
+        "20101234",
+        [
+            ("CSE110", "A", 4.0, 3.0),
+            ("CSE220", "B", 3.0, 3.0),
+            ("CSE221", "C+", 2.3, 3.0),
+            ("MAT110", "B+", 3.3, 3.0),
+        ],
+        {"Spring 2021": ["CSE110", "MAT110"], "Fall 2021": ["CSE220", "CSE221"]},
+    )
+
+
+def test_single_column_layout(tmp_path):
+    pdf_path = tmp_path / "column.pdf"
+    _write_pdf(pdf_path, [[cell] for row in TABLE_ROWS for cell in row])
+
+    name, student_id, courses, semesters = _parse(pdf_path)
+    assert (name, student_id) == ("John Doe", "20101234")
+    assert [code for code, *_ in courses] == ["CSE110", "CSE220", "CSE221", "MAT110"]
+    assert list(semesters) == ["Spring 2021", "Fall 2021"]